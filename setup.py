@@ -31,7 +31,7 @@ REQUIRED = [
 
 # What packages are optional?
 EXTRAS = {
-    # 'fancy feature': ['django'],
+    'columnar': ['pyarrow >= 1.0.0'],
 }
 
 # The rest you shouldn't have to touch too much :)
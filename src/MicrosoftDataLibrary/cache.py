@@ -0,0 +1,102 @@
+import contextlib
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Callable, Tuple
+
+
+class MetadataCache:
+    """On-disk cache for metadata and SSIS catalog lookups.
+
+    Entries are pickled to one file each and replaced atomically, so the same directory can be shared
+    by parallel worker processes (e.g. pabot). While one process loads an entry it holds a lock file and
+    other processes wait for its result instead of repeating the lookup. Keys are tuples, entries are
+    grouped by their first element so they can be cleared per namespace.
+    """
+
+    _LOCK_POLL_INTERVAL = 0.05
+
+    def __init__(self, cache_dir: str, ttl: float = 300, lock_timeout: float = 60) -> None:
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __repr__(self):
+        return f"MetadataCache({self.cache_dir})"
+
+    @staticmethod
+    def _digest(value: Any) -> str:
+        return hashlib.sha256(repr(value).encode("utf-8")).hexdigest()
+
+    def _path(self, key: Tuple) -> str:
+        return os.path.join(self.cache_dir, f"{self._digest(key[0])[:16]}-{self._digest(key)}.pickle")
+
+    def _read(self, path: str) -> Tuple[bool, Any]:
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return False, None
+            with open(path, "rb") as f:
+                return True, pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+
+    def _write(self, path: str, value: Any) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def _acquire_lock(self, lock_path: str) -> bool:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > self.lock_timeout:
+                    os.remove(lock_path)
+            except OSError:
+                pass
+            return False
+
+    def get_or_load(self, key: Tuple, loader: Callable[[], Any]) -> Any:
+        path = self._path(key)
+        lock_path = f"{path}.lock"
+        deadline = time.monotonic() + self.lock_timeout
+
+        while True:
+            found, value = self._read(path)
+            if found:
+                return value
+            if self._acquire_lock(lock_path):
+                break
+            if time.monotonic() >= deadline:
+                return loader()
+            time.sleep(self._LOCK_POLL_INTERVAL)
+
+        try:
+            found, value = self._read(path)
+            if not found:
+                value = loader()
+                self._write(path, value)
+            return value
+        finally:
+            # A waiting process may have taken the lock over as stale already
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(lock_path)
+
+    def clear(self, namespace: Any = None) -> None:
+        """Remove all entries, or only those with keys starting with `namespace`"""
+        prefix = f"{self._digest(namespace)[:16]}-" if namespace is not None else ""
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.startswith(prefix) and file_name.endswith(".pickle"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, file_name))
+                except OSError:
+                    pass
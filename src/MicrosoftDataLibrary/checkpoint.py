@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, Dict, Tuple
+from .lazy import LazyModule
+
+np = LazyModule("numpy")
+
+CHECKPOINT_VERSION = 1
+
+# Types of watermark values as stored in JSON
+INTEGER = "int"
+DATETIME = "datetime"
+ROWVERSION = "rowversion"
+TEXT = "text"
+
+
+def encode_watermark(value: Any) -> Tuple[str, Any]:
+    """Watermark value as a JSON friendly type name and value, rowversions as 0x prefixed hex"""
+    if value is None:
+        return TEXT, None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return ROWVERSION, "0x" + bytes(value).hex()
+    if isinstance(value, datetime):
+        # Timestamps from pandas may carry nanoseconds, which SQL Server and isoformat parsing do not
+        value = value.to_pydatetime() if hasattr(value, "to_pydatetime") else value
+        return DATETIME, value.isoformat()
+    if isinstance(value, np.datetime64):
+        return DATETIME, value.astype("datetime64[us]").item().isoformat()
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        return INTEGER, int(value)
+    return TEXT, str(value)
+
+
+def decode_watermark(value_type: str, value: Any) -> Any:
+    if value is None:
+        return None
+    if value_type == ROWVERSION:
+        return bytes.fromhex(value[2:])
+    if value_type == DATETIME:
+        return datetime.fromisoformat(value)
+    if value_type == INTEGER:
+        return int(value)
+    return value
+
+
+def parse_watermark(text: str) -> Any:
+    """Watermark value given as text, e.g. from Robot Framework data: 0x hex, integer or ISO date/time"""
+    if text.lower().startswith("0x"):
+        return bytes.fromhex(text[2:])
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def previous_rowversion(value: bytes) -> bytes:
+    """The rowversion just below `value`, rowversions being 8 byte big-endian counters"""
+    return (int.from_bytes(value, "big") - 1).to_bytes(len(value), "big")
+
+
+class CheckpointStore:
+    """Watermark checkpoints per connection and table, kept in a JSON file when `file_path` is given
+
+    The file is rewritten atomically on every change, so an interrupted run leaves the previous
+    checkpoints intact.
+    """
+
+    def __init__(self, file_path: str = None) -> None:
+        self.file_path = os.path.abspath(file_path) if file_path else None
+        self._lock = threading.Lock()
+        self._checkpoints = self._read()
+
+    def __repr__(self):
+        return f"CheckpointStore({self.file_path})"
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        if self.file_path is None or not os.path.exists(self.file_path):
+            return {}
+        with open(self.file_path, encoding="utf-8") as f:
+            content = json.load(f)
+        if content.get("version") != CHECKPOINT_VERSION:
+            raise RuntimeError(f"Unsupported checkpoint file version {content.get('version')} in {self.file_path}")
+        return content["checkpoints"]
+
+    def _write(self) -> None:
+        if self.file_path is None:
+            return
+        directory = os.path.dirname(self.file_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": CHECKPOINT_VERSION, "checkpoints": self._checkpoints}, f, indent=2)
+            os.replace(tmp_path, self.file_path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def get(self, connection: str, table: str) -> Tuple[str, Any]:
+        """Watermark column and value of a table, or (None, None) without a checkpoint"""
+        with self._lock:
+            checkpoint = self._checkpoints.get(connection, {}).get(table)
+        if checkpoint is None:
+            return None, None
+        return checkpoint["column"], decode_watermark(checkpoint["type"], checkpoint["value"])
+
+    def set(self, connection: str, table: str, column: str, value: Any) -> None:
+        value_type, encoded = encode_watermark(value)
+        with self._lock:
+            self._checkpoints.setdefault(connection, {})[table] = {
+                "column": column, "type": value_type, "value": encoded, "updated": datetime.now().isoformat()
+            }
+            self._write()
+
+    def reset(self, connection: str, table: str) -> None:
+        with self._lock:
+            if self._checkpoints.get(connection, {}).pop(table, None) is not None:
+                self._write()
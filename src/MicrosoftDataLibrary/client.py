@@ -1,74 +1,325 @@
+import collections
+import gzip
+import hashlib
 import subprocess
-from typing import List, Any, Dict
-import pandas as pd
-import sqlalchemy as alc
-from sqlalchemy.orm import sessionmaker
+from typing import List, Any, Dict, Iterator, Callable
 from robot.api import logger
+from . import columnar, snapshot
+from .cache import MetadataCache
+from .lazy import LazyModule
+
+pd = LazyModule("pandas")
+alc = LazyModule("sqlalchemy")
+orm = LazyModule("sqlalchemy.orm")
+mssql = LazyModule("sqlalchemy.dialects.mssql")
+
+ResultBudget = collections.namedtuple('ResultBudget', 'max_rows max_bytes strict')
 
 
 class DatabaseClient:
 
-    def __init__(self, connection_string: str, **kwargs) -> None:
+    DEFAULT_CHUNK_SIZE = 10000
+
+    ROW_COUNT_BATCH_SIZE = 500
+
+    SSIS_EXECUTION_STATUSES = {
+        1: "created",
+        2: "running",
+        3: "canceled",
+        4: "failed",
+        5: "pending",
+        6: "ended unexpectedly",
+        7: "succeeded",
+        8: "stopping",
+        9: "completed"
+    }
+
+    SSIS_FINISHED_STATUSES = (3, 4, 6, 7, 9)
+
+    SSIS_PARAMETER_OBJECT_TYPES = {
+        "$Project": 20,
+        "$Package": 30,
+        "$ServerOption": 50
+    }
+
+    SSIS_MESSAGE_TYPES = {
+        "prevalidate": 10,
+        "postvalidate": 20,
+        "preexecute": 30,
+        "postexecute": 40,
+        "statuschange": 50,
+        "progress": 60,
+        "information": 70,
+        "variablevaluechanged": 80,
+        "diagnostic": 90,
+        "querycancel": 100,
+        "warning": 110,
+        "error": 120,
+        "taskfailed": 130,
+        "diagnosticex": 140,
+        "custom": 200,
+        "nondiagnostic": 400
+    }
+
+    def __init__(self, connection_string: str, metadata_cache: MetadataCache = None,
+                 result_budget: ResultBudget = None, **kwargs) -> None:
         self._engine = alc.create_engine(connection_string, **kwargs)
+        self._metadata_cache = metadata_cache
+        self.result_budget = result_budget
+        self._spilled_results = []
+        self._cache_namespace = hashlib.sha256(repr(self._engine.url).encode("utf-8")).hexdigest()
+
+    def _cached(self, loader: Callable[[], Any], *key: Any) -> Any:
+        if self._metadata_cache is None:
+            return loader()
+        return self._metadata_cache.get_or_load((self._cache_namespace,) + key, loader)
+
+    def _clear_cache(self) -> None:
+        # Statements run through the client may change the schema, so its cached metadata is dropped
+        if self._metadata_cache is not None:
+            self._metadata_cache.clear(self._cache_namespace)
 
     def __repr__(self):
         return str(self._engine)
 
     def disconnect(self):
+        for spilled_result in self._spilled_results:
+            spilled_result.close()
+        self._spilled_results = []
         if callable(getattr(self._engine, "dispose", None)):
             self._engine.dispose()
         self._engine = None
 
     def execute_query(self, query: str) -> None:
-        res = self._engine.execute(query)
-        res.close()
+        try:
+            res = self._engine.execute(query)
+            res.close()
+        finally:
+            self._clear_cache()
 
-    def read_query(self, query: str) -> pd.DataFrame:
-        return pd.read_sql(query, con=self._engine)
+    def read_query(self, query: str, params: List[Any] = None) -> "pd.DataFrame":
+        return pd.read_sql(query, con=self._engine, params=tuple(params) if params else None)
 
-    def load_df(self, df: pd.DataFrame, schema_name: str, table_name: str) -> None:
-        df.to_sql(table_name, schema=schema_name, con=self._engine, index=False, if_exists='append')
+    def _exceeds_result_budget(self, row_count: int, byte_count: int) -> bool:
+        max_rows, max_bytes, _ = self.result_budget
+        return (max_rows is not None and row_count > max_rows) or (max_bytes is not None and byte_count > max_bytes)
+
+    def read_query_within_budget(self, query: str, params: List[Any] = None) -> Any:
+        """Like `read_query`, but a result over the result budget is spilled to disk or fails the query
+
+        Only used for result sets handed to the user, metadata and internal lookups always use `read_query`.
+        """
+        if self.result_budget is None:
+            return self.read_query(query, params=params)
+
+        chunks = []
+        row_count = byte_count = 0
+        max_rows = self.result_budget.max_rows
+        # One row past the budget is enough to know it is exceeded
+        chunk_size = self.DEFAULT_CHUNK_SIZE if max_rows is None else min(self.DEFAULT_CHUNK_SIZE, max_rows + 1)
+        chunk_iter = self.iter_query(query, params=params, chunk_size=chunk_size)
+
+        for chunk in chunk_iter:
+            chunks.append(chunk)
+            row_count += len(chunk)
+            byte_count += int(chunk.memory_usage(deep=True, index=False).sum())
+
+            if self._exceeds_result_budget(row_count, byte_count):
+                if self.result_budget.strict:
+                    chunk_iter.close()
+                    max_rows, max_bytes, _ = self.result_budget
+                    raise RuntimeError(f"Query result exceeded the result budget of {max_rows} rows / {max_bytes} "
+                                       f"bytes after {row_count} rows ({byte_count} bytes). Narrow the query or "
+                                       f"raise the budget with 'Set Result Budget'.")
+                logger.info(f"Query result exceeded the result budget after {row_count} rows ({byte_count} bytes), "
+                            f"spilling to disk")
+                spilled_result = columnar.spill_to_file(self._drain(chunks, chunk_iter))
+                self._spilled_results.append(spilled_result)
+                return spilled_result
+
+        return pd.concat(chunks, ignore_index=True)
+
+    @staticmethod
+    def _drain(chunks: List["pd.DataFrame"], chunk_iter: Iterator["pd.DataFrame"]) -> Iterator["pd.DataFrame"]:
+        # Hand over the chunks read so far one by one, so they can be freed once written
+        while chunks:
+            yield chunks.pop(0)
+        yield from chunk_iter
+
+    def iter_query(self, query: str, params: List[Any] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator["pd.DataFrame"]:
+        with self._engine.connect() as connection:
+            streaming_connection = connection.execution_options(stream_results=True)
+            yield from pd.read_sql(query, con=streaming_connection, params=tuple(params) if params else None,
+                                   chunksize=chunk_size)
+
+    def export_query_to_file(self, query: str, file_path: str, file_format: str = None,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        file_format = file_format or self._export_file_format_of(file_path)
+        chunks = self.iter_query(query, chunk_size=chunk_size)
+        row_count = 0
+
+        if file_format in ("csv", "csv.gz"):
+            open_file = gzip.open if file_format == "csv.gz" else open
+            with open_file(file_path, "wt", newline="", encoding="utf-8") as f:
+                for chunk in chunks:
+                    chunk.to_csv(f, header=row_count == 0, index=False)
+                    row_count += len(chunk)
+        elif file_format in (columnar.PARQUET, columnar.FEATHER):
+            with columnar.ColumnarFileWriter(file_path, file_format=file_format) as writer:
+                for chunk in chunks:
+                    writer.write(chunk)
+                    row_count += len(chunk)
+        else:
+            raise RuntimeError(f"Unsupported export file format '{file_format}'")
+
+        return row_count
+
+    @staticmethod
+    def _export_file_format_of(file_path: str) -> str:
+        lower_path = file_path.lower()
+        if lower_path.endswith(".csv"):
+            return "csv"
+        if lower_path.endswith(".gz"):
+            return "csv.gz"
+        return columnar.file_format_of(file_path)
+
+    def load_df(self, df: "pd.DataFrame", schema_name: str, table_name: str, dtype: Dict[str, Any] = None) -> None:
+        # Creates the table when it does not exist yet
+        try:
+            df.to_sql(table_name, schema=schema_name, con=self._engine, index=False, if_exists='append', dtype=dtype)
+        finally:
+            self._clear_cache()
 
     def truncate_table(self, schema_name: str, table_name: str) -> None:
-        session_maker = sessionmaker(bind=self._engine)
+        session_maker = orm.sessionmaker(bind=self._engine)
         session = session_maker()
         session.execute(f"TRUNCATE TABLE {schema_name}.{table_name}")
         session.commit()
         session.close()
+        self._clear_cache()
 
     def list_schemas(self) -> List[str]:
-        return alc.inspect(self._engine).get_schema_names()
+        return self._cached(lambda: alc.inspect(self._engine).get_schema_names(), "schemas")
 
     def list_tables(self, schema_name: str) -> List[str]:
-        return self._engine.table_names(schema=schema_name)
+        return self._cached(lambda: self._engine.table_names(schema=schema_name), "tables", schema_name)
 
-    def get_table_metadata(self, schema_name: str, table_name: str) -> pd.DataFrame:
-        res = alc.inspect(self._engine).get_columns(schema=schema_name, table_name=table_name)
-        return pd.DataFrame(res)
+    def get_table_metadata(self, schema_name: str, table_name: str) -> "pd.DataFrame":
+        def load() -> "pd.DataFrame":
+            res = alc.inspect(self._engine).get_columns(schema=schema_name, table_name=table_name)
+            return pd.DataFrame(res)
+        return self._cached(load, "columns", schema_name, table_name)
+
+    def get_primary_key(self, schema_name: str, table_name: str) -> List[str]:
+        def load() -> List[str]:
+            res = alc.inspect(self._engine).get_pk_constraint(schema=schema_name, table_name=table_name)
+            return list(res.get("constrained_columns") or [])
+        return self._cached(load, "primary_key", schema_name, table_name)
+
+    def get_schema_snapshot(self, schema_name: str = None) -> Dict[str, Any]:
+        """Columns, keys and indexes of all tables, or those in one schema, from three bulk catalog queries
+
+        Always read live, never from the metadata cache: saved snapshot files are the way to keep one.
+        """
+        frames = []
+        for query, schema_column in snapshot.SNAPSHOT_QUERIES:
+            schema_filter = f"AND {schema_column} = ?" if schema_name else ""
+            # Read in full regardless of the result budget, the snapshot is built in memory anyway
+            frames.append(pd.read_sql(query.format(schema_filter=schema_filter), con=self._engine,
+                                      params=(schema_name,) if schema_name else None))
+        return snapshot.build_snapshot(*frames)
+
+    @property
+    def url(self) -> str:
+        """Connection URL with the password masked"""
+        return repr(self._engine.url)
+
+    def get_max_watermark(self, schema_name: str, table_name: str, column_name: str) -> Any:
+        df = self.read_query(f"SELECT MAX({column_name}) AS watermark FROM {schema_name}.{table_name}")
+        value = df.iloc[0, 0]
+        return None if value is None or (not isinstance(value, bytes) and pd.isna(value)) else value
+
+    def is_rowversion_column(self, schema_name: str, table_name: str, column_name: str) -> bool:
+        if self._engine.dialect.name != "mssql":
+            return False
+        columns = self.get_table_metadata(schema_name, table_name)
+        column_types = dict(zip(columns["name"], columns["type"]))
+        return isinstance(column_types.get(column_name), mssql.TIMESTAMP)
+
+    def get_min_active_rowversion(self) -> bytes:
+        """Lowest rowversion of the database that may still be committed, all lower ones are final"""
+        return bytes(self.read_query("SELECT MIN_ACTIVE_ROWVERSION() AS watermark").iloc[0, 0])
+
+    def iter_changes(self, schema_name: str, table_name: str, column_name: str, after: Any = None,
+                     until: Any = None, before: Any = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator["pd.DataFrame"]:
+        """Records with a watermark after `after`, up to `until` and below `before`, in watermark order"""
+        conditions, params = [], []
+        if after is not None:
+            conditions.append(f"{column_name} > ?")
+            params.append(after)
+        if until is not None:
+            conditions.append(f"{column_name} <= ?")
+            params.append(until)
+        if before is not None:
+            conditions.append(f"{column_name} < ?")
+            params.append(before)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        query = f"SELECT * FROM {schema_name}.{table_name}{where} ORDER BY {column_name}"
+        return self.iter_query(query, params=params, chunk_size=chunk_size)
+
+    def get_row_counts(self, tables: List[str]) -> Dict[str, int]:
+        """Exact record counts of `schema.table` names, counted in UNION ALL batches of `ROW_COUNT_BATCH_SIZE`"""
+        count = "COUNT_BIG(*)" if self._engine.dialect.name == "mssql" else "COUNT(*)"
+        counts = {}
+        # Each table takes one parameter, and SQL Server allows at most 2100 per statement
+        for start in range(0, len(tables), self.ROW_COUNT_BATCH_SIZE):
+            batch = list(tables[start:start + self.ROW_COUNT_BATCH_SIZE])
+            query = " UNION ALL ".join(f"SELECT ? AS table_name, {count} AS row_count FROM {table}" for table in batch)
+            df = self.read_query(query, params=batch)
+            counts.update((table, int(row_count)) for table, row_count in zip(df["table_name"], df["row_count"]))
+        return counts
+
+    def get_partition_row_counts(self, schema_names: List[str]) -> Dict[str, int]:
+        """Approximate record counts of all tables in the given schemas from partition metadata, without scanning"""
+        if not schema_names:
+            return {}
+        query = ("SELECT s.name + '.' + t.name AS table_name, SUM(p.rows) AS row_count "
+                 "FROM sys.tables t "
+                 "JOIN sys.schemas s ON s.schema_id = t.schema_id "
+                 "JOIN sys.partitions p ON p.object_id = t.object_id AND p.index_id IN (0, 1) "
+                 f"WHERE s.name IN ({','.join('?' * len(schema_names))}) "
+                 "GROUP BY s.name, t.name")
+        df = self.read_query(query, params=list(schema_names))
+        return {table: int(row_count) for table, row_count in zip(df["table_name"], df["row_count"])}
 
     def list_functions(self) -> List[str]:
         query = "SELECT routine_name FROM information_schema.routines WHERE routine_type = 'FUNCTION'"
-        df = self.read_query(query)
+        df = self._cached(lambda: self.read_query(query), "functions")
         return df['routine_name'].values
 
     def list_procedures(self) -> List[str]:
         query = "SELECT routine_name FROM information_schema.routines WHERE routine_type = 'PROCEDURE'"
-        df = self.read_query(query)
+        df = self._cached(lambda: self.read_query(query), "procedures")
         return df['routine_name'].values
 
     def execute_procedure(self, procedure_name: str, params: List[Any] = None) -> Any:
 
-        if params:
-            q_params = ",".join("?" * len(params))
-            results_set = self._engine.execute(f"exec {procedure_name} {q_params}", *params)
-        else:
-            results_set = self._engine.execute(f"exec {procedure_name}")
+        try:
+            if params:
+                q_params = ",".join("?" * len(params))
+                results_set = self._engine.execute(f"exec {procedure_name} {q_params}", *params)
+            else:
+                results_set = self._engine.execute(f"exec {procedure_name}")
+        finally:
+            self._clear_cache()
 
         if results_set.returns_rows:
             return pd.DataFrame(results_set)
         return None
 
-    def __query_ssis_catalog(self) -> pd.DataFrame:
+    def __query_ssis_catalog(self) -> "pd.DataFrame":
         query = """SELECT fd.name as 'folder_name', 
                           pj.name as 'project_name', 
                           pk.name as 'package_name'
@@ -78,7 +329,7 @@ class DatabaseClient:
                      JOIN catalog.packages pk
                        ON pj.project_id = pk.project_id
         """
-        return self.read_query(query)
+        return self._cached(lambda: self.read_query(query), "ssis_catalog")
 
     def list_ssis_catalog(self) -> List[Dict[str, str]]:
         return self.__query_ssis_catalog().to_dict(orient="records")
@@ -107,9 +358,66 @@ class DatabaseClient:
 
     def get_ssis_catalog_properties(self) -> Dict[str, str]:
         query = "select property_name, property_value from catalog.catalog_properties"
-        df = self.read_query(query)
+        df = self._cached(lambda: self.read_query(query), "ssis_catalog_properties")
         return {prop['property_name']: prop['property_value'] for prop in df.to_dict(orient="records")}
 
+    def create_ssis_execution(self, folder_name: str, project_name: str, package_name: str,
+                              use32bitruntime: bool = False, reference_id: int = None) -> int:
+        query = """SET NOCOUNT ON;
+                   DECLARE @execution_id BIGINT;
+                   EXEC catalog.create_execution @folder_name = ?,
+                                                 @project_name = ?,
+                                                 @package_name = ?,
+                                                 @use32bitruntime = ?,
+                                                 @reference_id = ?,
+                                                 @execution_id = @execution_id OUTPUT;
+                   SELECT @execution_id AS execution_id;
+        """
+        with self._engine.begin() as connection:
+            res = connection.execute(query, folder_name, project_name, package_name, use32bitruntime, reference_id)
+            return int(res.scalar())
+
+    def set_ssis_execution_parameter_value(self, execution_id: int, object_type: int,
+                                           parameter_name: str, parameter_value: Any) -> None:
+        query = """EXEC catalog.set_execution_parameter_value @execution_id = ?,
+                                                              @object_type = ?,
+                                                              @parameter_name = ?,
+                                                              @parameter_value = ?
+        """
+        with self._engine.begin() as connection:
+            connection.execute(query, execution_id, object_type, parameter_name, parameter_value)
+
+    def start_ssis_execution(self, execution_id: int) -> None:
+        with self._engine.begin() as connection:
+            connection.execute("EXEC catalog.start_execution @execution_id = ?", execution_id)
+
+    def get_ssis_execution_status(self, execution_id: int) -> int:
+        query = "SELECT status FROM catalog.executions WHERE execution_id = ?"
+        df = self.read_query(query, params=[execution_id])
+        if df.empty:
+            raise RuntimeError(f"SSIS execution '{execution_id}' does not exist in the catalog")
+        return int(df.iloc[0, 0])
+
+    def read_ssis_event_messages(self, execution_id: int, after_event_message_id: int = 0,
+                                 message_types: List[int] = None, batch_size: int = 10000) -> "pd.DataFrame":
+        query = """SELECT TOP (?) event_message_id,
+                                  message_time,
+                                  message_type,
+                                  message_source_name,
+                                  package_name,
+                                  event_name,
+                                  message
+                     FROM catalog.event_messages
+                    WHERE operation_id = ?
+                      AND event_message_id > ?
+        """
+        params = [batch_size, execution_id, after_event_message_id]
+        if message_types:
+            query += f" AND message_type IN ({','.join('?' * len(message_types))})"
+            params.extend(message_types)
+        query += " ORDER BY event_message_id"
+        return self.read_query(query, params=params)
+
 
 class SSISClient:
 
@@ -0,0 +1,254 @@
+import os
+import tempfile
+from typing import Iterator, List
+from .lazy import LazyModule
+
+pd = LazyModule("pandas")
+
+PARQUET = "parquet"
+FEATHER = "feather"
+
+_FILE_FORMATS = {
+    ".parquet": PARQUET,
+    ".pq": PARQUET,
+    ".feather": FEATHER,
+    ".arrow": FEATHER,
+    ".ipc": FEATHER
+}
+
+
+def import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("Parquet and Feather support requires pyarrow. "
+                           "Install it with: pip install robotframework-miscrosoft-data[columnar]")
+    return pyarrow
+
+
+def file_format_of(file_path: str) -> str:
+    _, extension = os.path.splitext(file_path)
+    if extension.lower() not in _FILE_FORMATS:
+        raise RuntimeError(f"Cannot determine the columnar file format of '{file_path}'")
+    return _FILE_FORMATS[extension.lower()]
+
+
+def iter_parquet(file_path: str, columns: List[str] = None) -> Iterator["pd.DataFrame"]:
+    """Read a Parquet file one row group at a time"""
+    import_pyarrow()
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(file_path)
+    for row_group in range(parquet_file.num_row_groups):
+        yield parquet_file.read_row_group(row_group, columns=columns).to_pandas()
+
+
+def iter_feather(file_path: str, columns: List[str] = None) -> Iterator["pd.DataFrame"]:
+    """Read a Feather (Arrow IPC) file one record batch at a time"""
+    pa = import_pyarrow()
+    import pyarrow.ipc as ipc
+
+    with pa.memory_map(file_path) as source:
+        reader = ipc.open_file(source)
+        for batch_number in range(reader.num_record_batches):
+            batch = reader.get_batch(batch_number)
+            if columns:
+                batch = batch.select(columns)
+            yield batch.to_pandas()
+
+
+def iter_columnar_file(file_path: str, columns: List[str] = None, file_format: str = None) -> Iterator["pd.DataFrame"]:
+    """Read a Parquet or Feather file in chunks, in the format given or else the one of its extension"""
+    if (file_format or file_format_of(file_path)) == PARQUET:
+        return iter_parquet(file_path, columns=columns)
+    return iter_feather(file_path, columns=columns)
+
+
+def read_columnar_file(file_path: str, columns: List[str] = None, file_format: str = None) -> "pd.DataFrame":
+    """Read a Parquet or Feather file, in the format given or else the one of its extension"""
+    pa = import_pyarrow()
+    file_format = file_format or file_format_of(file_path)
+    try:
+        if file_format == PARQUET:
+            import pyarrow.parquet as pq
+            return pq.read_table(file_path, columns=columns).to_pandas()
+
+        import pyarrow.feather as feather
+        return feather.read_table(file_path, columns=columns).to_pandas()
+    except pa.ArrowInvalid as e:
+        raise RuntimeError(f"Cannot read '{file_path}' as a {file_format.capitalize()} file: {e}")
+
+
+class ColumnarFileWriter:
+    """Write Dataframes chunk by chunk to a Parquet or Feather file
+
+    The schema of the file is taken from the first chunks, later chunks are converted to it. A column
+    that is all NULL has no type yet, so chunks are held back until every column has one, for at most
+    `MAX_PENDING_ROWS` rows. Columns still without a type by then are written as strings.
+    """
+
+    MAX_PENDING_ROWS = 100000
+
+    def __init__(self, file_path: str, file_format: str = None, compression: str = None) -> None:
+        self._pa = import_pyarrow()
+        self.file_path = file_path
+        self.file_format = file_format or file_format_of(file_path)
+        self.compression = compression
+        self._schema = None
+        self._writer = None
+        self._pending = []
+
+    def __enter__(self) -> "ColumnarFileWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _open(self, schema) -> None:
+        if self.file_format == PARQUET:
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self.file_path, schema, compression=self.compression or "snappy")
+        else:
+            import pyarrow.ipc as ipc
+            options = ipc.IpcWriteOptions(compression=self.compression)
+            self._writer = ipc.new_file(self.file_path, schema, options=options)
+
+    def _untyped_fields(self) -> List[str]:
+        return [field.name for field in self._schema if field.type == self._pa.null()]
+
+    def write(self, df: "pd.DataFrame") -> None:
+        if self._writer is not None:
+            self._writer.write_table(self._convert(df))
+            return
+
+        table = self._pa.Table.from_pandas(df, preserve_index=False)
+        if self._schema is None:
+            self._schema = table.schema
+        else:
+            # Columns that were all NULL so far take the type of the first chunk with values
+            for name in self._untyped_fields():
+                field = table.schema.field(name)
+                if field.type != self._pa.null():
+                    self._schema = self._schema.set(self._schema.get_field_index(name), field)
+        self._pending.append(table)
+
+        if not self._untyped_fields() or sum(t.num_rows for t in self._pending) >= self.MAX_PENDING_ROWS:
+            self._write_pending(self._pa.string())
+
+    def _convert(self, df: "pd.DataFrame"):
+        try:
+            return self._pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+        except (self._pa.ArrowInvalid, self._pa.ArrowTypeError):
+            # E.g. numbers in a column that was written as strings
+            return self._pa.Table.from_pandas(df, preserve_index=False).cast(self._schema)
+
+    def _write_pending(self, untyped_type) -> None:
+        for name in self._untyped_fields():
+            self._schema = self._schema.set(self._schema.get_field_index(name), self._pa.field(name, untyped_type))
+        self._open(self._schema)
+        for table in self._pending:
+            self._writer.write_table(table.cast(self._schema))
+        self._pending = []
+
+    def close(self) -> None:
+        if self._pending:
+            # Columns that stayed NULL throughout keep the null type
+            self._write_pending(self._pa.null())
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class SpilledResult:
+    """Lazy handle on a result set that was spilled to a memory mapped Arrow (Feather) file
+
+    The data stays in the file and is paged in by the operating system on access. The handle supports
+    `len()`, indexing and slicing, iteration over records (as dictionaries) and equality with another
+    handle, a Dataframe or a list of records. `close()` removes the file.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        pa = import_pyarrow()
+        import pyarrow.ipc as ipc
+
+        self.file_path = file_path
+        self._source = pa.memory_map(file_path)
+        self._table = ipc.open_file(self._source).read_all()
+
+    def __repr__(self):
+        return f"<SpilledResult {self.num_rows} rows x {len(self.columns)} columns in {self.file_path}>"
+
+    def __len__(self):
+        return self.num_rows
+
+    @property
+    def num_rows(self) -> int:
+        return self._table.num_rows
+
+    @property
+    def columns(self) -> List[str]:
+        return self._table.column_names
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self.num_rows)
+            if step != 1:
+                return self.to_pandas().iloc[item].reset_index(drop=True)
+            return self._table.slice(start, max(stop - start, 0)).to_pandas()
+        if item < 0:
+            item += self.num_rows
+        if not 0 <= item < self.num_rows:
+            raise IndexError(f"Row {item} is out of range for {self.num_rows} rows")
+        return self._table.slice(item, 1).to_pylist()[0]
+
+    def __iter__(self):
+        for batch in self._table.to_batches():
+            yield from batch.to_pylist()
+
+    def iter_chunks(self) -> Iterator["pd.DataFrame"]:
+        offset = 0
+        for batch in self._table.to_batches():
+            df = batch.to_pandas()
+            df.index = pd.RangeIndex(offset, offset + len(df))
+            offset += len(df)
+            yield df
+
+    def to_pandas(self) -> "pd.DataFrame":
+        return self._table.to_pandas()
+
+    def __eq__(self, other):
+        if isinstance(other, SpilledResult):
+            return self._table.equals(other._table)
+        if len(other) != self.num_rows:
+            return False
+        if isinstance(other, pd.DataFrame):
+            if list(other.columns) != self.columns:
+                return False
+            return all(chunk.equals(other.iloc[chunk.index.start:chunk.index.stop].set_axis(chunk.index))
+                       for chunk in self.iter_chunks())
+        return all(row == other_row for row, other_row in zip(self, other))
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def close(self) -> None:
+        if self._table is not None:
+            self._table = None
+            self._source.close()
+            try:
+                os.remove(self.file_path)
+            except OSError:
+                pass
+
+
+def spill_to_file(chunks: Iterator["pd.DataFrame"], spill_dir: str = None) -> SpilledResult:
+    """Write Dataframe chunks to an uncompressed, memory mappable Arrow file and return a handle on it"""
+    import_pyarrow()
+    fd, file_path = tempfile.mkstemp(prefix="mdl-spill-", suffix=".arrow", dir=spill_dir)
+    os.close(fd)
+    with ColumnarFileWriter(file_path, file_format=FEATHER) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    return SpilledResult(file_path)
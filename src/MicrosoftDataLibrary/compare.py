@@ -0,0 +1,199 @@
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List
+from .lazy import LazyModule
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+NUMERIC = "numeric"
+DATETIME = "datetime"
+TEXT = "text"
+
+
+class ComparisonResult:
+    """Outcome of `compare_dataframes`, with a bounded report of the first mismatches"""
+
+    def __init__(self, problems: List[str], differences: List[str], mismatch_count: int) -> None:
+        self.problems = problems
+        self.differences = differences
+        self.mismatch_count = mismatch_count
+
+    @property
+    def matches(self) -> bool:
+        return not self.problems and self.mismatch_count == 0
+
+    def __bool__(self):
+        return self.matches
+
+    def report(self) -> str:
+        if self.matches:
+            return "Actual matches expected."
+        lines = ["Actual does not match expected."] + self.problems
+        if self.mismatch_count:
+            lines.append(f"{self.mismatch_count} mismatching cell(s), showing the first {len(self.differences)}:")
+            lines.extend(self.differences)
+        return "\n".join(lines)
+
+
+def _is_decimal_column(series: "pd.Series") -> bool:
+    values = series.dropna()
+    return series.dtype == object and len(values) > 0 and all(isinstance(v, (Decimal, int, float)) for v in values)
+
+
+def _column_kind(series: "pd.Series") -> str:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return DATETIME
+    if pd.api.types.is_numeric_dtype(series) or _is_decimal_column(series):
+        return NUMERIC
+    return TEXT
+
+
+def _comparison_kind(expected: "pd.Series", actual: "pd.Series") -> str:
+    kinds = {_column_kind(expected), _column_kind(actual)}
+    if kinds == {NUMERIC}:
+        return NUMERIC
+    if DATETIME in kinds:
+        return DATETIME
+    return TEXT
+
+
+def _equal_cells(expected: "pd.Series", actual: "pd.Series", kind: str, tolerance: float,
+                 relative_tolerance: float, datetime_tolerance: timedelta) -> "np.ndarray":
+    if kind == NUMERIC:
+        e = pd.to_numeric(expected, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        a = pd.to_numeric(actual, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        # np.isclose scales rtol by its second argument, which is the expected value here
+        return np.isclose(a, e, rtol=relative_tolerance, atol=tolerance, equal_nan=True)
+
+    if kind == DATETIME:
+        e = pd.to_datetime(expected, errors="coerce")
+        a = pd.to_datetime(actual, errors="coerce")
+        both_null = (e.isna() & a.isna()).to_numpy()
+        close = ((e - a).abs() <= pd.Timedelta(datetime_tolerance or 0)).fillna(False).to_numpy(dtype=bool)
+        return close | both_null
+
+    e_null = expected.isna().to_numpy()
+    a_null = actual.isna().to_numpy()
+    same = (expected.astype(str).to_numpy() == actual.astype(str).to_numpy())
+    return (same & ~e_null & ~a_null) | (e_null & a_null)
+
+
+def _normalized(series: "pd.Series", kind: str) -> "pd.Series":
+    """Values of a column in the form they are compared in, for sorting and matching keys"""
+    if kind == NUMERIC:
+        return pd.to_numeric(series, errors="coerce")
+    if kind == DATETIME:
+        return pd.to_datetime(series, errors="coerce")
+    return series.astype(str).where(series.notna())
+
+
+def _align(expected: "pd.DataFrame", actual: "pd.DataFrame", keys: List[str], kinds: Dict[str, str],
+           ignore_order: bool, tolerance: float, relative_tolerance: float, datetime_tolerance: timedelta,
+           problems: List[str]):
+    if keys:
+        for name, df in (("expected", expected), ("actual", actual)):
+            if df.duplicated(subset=keys).any():
+                raise RuntimeError(f"Key columns {keys} are not unique in {name} data")
+        # Keys match on value, e.g. an int key from XLSX matches the same key as text from SQL Server
+        expected = expected.assign(**{key: _normalized(expected[key], kinds[key]) for key in keys}).set_index(keys)
+        actual = actual.assign(**{key: _normalized(actual[key], kinds[key]) for key in keys}).set_index(keys)
+        missing = expected.index.difference(actual.index)
+        unexpected = actual.index.difference(expected.index)
+        if len(missing):
+            problems.append(f"{len(missing)} expected row(s) missing from actual, e.g. keys {list(missing[:5])}")
+        if len(unexpected):
+            problems.append(f"{len(unexpected)} unexpected row(s) in actual, e.g. keys {list(unexpected[:5])}")
+        common = expected.index.intersection(actual.index)
+        return expected.loc[common], actual.loc[common]
+
+    if ignore_order:
+        expected, actual = (_sorted(df, kinds, tolerance, relative_tolerance, datetime_tolerance)
+                            for df in (expected, actual))
+
+    if len(expected) != len(actual):
+        problems.append(f"Expected {len(expected)} rows but actual has {len(actual)} rows")
+        size = min(len(expected), len(actual))
+        expected, actual = expected.iloc[:size], actual.iloc[:size]
+
+    return expected.reset_index(drop=True), actual.reset_index(drop=True)
+
+
+def _sorted(df: "pd.DataFrame", kinds: Dict[str, str], tolerance: float, relative_tolerance: float,
+            datetime_tolerance: timedelta) -> "pd.DataFrame":
+    """Sort rows on their normalized values, columns compared with a tolerance last and rounded to it
+
+    Values that match within the tolerance then sort into the same position on both sides, unless they
+    straddle a rounding boundary and all other columns are equal too.
+    """
+    exact, approximate = [], []
+    for column, kind in kinds.items():
+        values = _normalized(df[column], kind).reset_index(drop=True)
+        if kind == NUMERIC and (tolerance or relative_tolerance):
+            approximate.append((values.astype("float64") / tolerance).round() if tolerance else values)
+        elif kind == DATETIME and datetime_tolerance:
+            approximate.append(values.dt.round(pd.Timedelta(datetime_tolerance)))
+        else:
+            exact.append(values)
+    if not exact and not approximate:
+        return df
+    sort_keys = pd.concat(exact + approximate, axis=1, ignore_index=True)
+    order = sort_keys.sort_values(list(sort_keys.columns), kind="mergesort", na_position="last").index
+    return df.iloc[order]
+
+
+def compare_dataframes(expected: "pd.DataFrame", actual: "pd.DataFrame", keys: List[str] = None,
+                       ignore_order: bool = False, tolerance: float = 0, relative_tolerance: float = 0,
+                       datetime_tolerance: timedelta = None, normalize_dtypes: bool = True,
+                       max_differences: int = 10) -> ComparisonResult:
+    """Compare two Dataframes column by column with vectorized operations.
+
+    Rows are aligned on the `keys` columns when given, otherwise by position, after sorting both sides on
+    their normalized values when `ignore_order` is set. With `normalize_dtypes` integer, float and Decimal
+    columns compare as numbers, date/time columns as timestamps and everything else as text, so e.g. int64
+    from XLSX matches Int32 or Decimal from SQL Server. Otherwise differing column dtypes are reported as
+    mismatches. Numbers match within `tolerance` plus `relative_tolerance` times the expected value.
+    """
+    problems = []
+
+    for name, df in (("expected", expected), ("actual", actual)):
+        if any(key not in df.columns for key in keys or []):
+            raise RuntimeError(f"Key columns {keys} are not all present in {name} data")
+
+    missing_columns = [c for c in expected.columns if c not in actual.columns]
+    unexpected_columns = [c for c in actual.columns if c not in expected.columns]
+    if missing_columns:
+        problems.append(f"Columns missing from actual: {missing_columns}")
+    if unexpected_columns:
+        problems.append(f"Unexpected columns in actual: {unexpected_columns}")
+    columns = [c for c in expected.columns if c in actual.columns and c not in (keys or [])]
+
+    if not normalize_dtypes:
+        for column in columns:
+            if expected[column].dtype != actual[column].dtype:
+                problems.append(f"Column '{column}' has dtype {actual[column].dtype}, "
+                                f"expected {expected[column].dtype}")
+
+    kinds = {column: _comparison_kind(expected[column], actual[column]) for column in list(keys or []) + columns}
+    expected, actual = _align(expected[list(keys or []) + columns], actual[list(keys or []) + columns],
+                              keys, kinds, ignore_order, tolerance, relative_tolerance, datetime_tolerance,
+                              problems)
+
+    if not columns or not len(expected):
+        return ComparisonResult(problems, [], 0)
+
+    equal = np.column_stack([
+        _equal_cells(expected[column], actual[column], _comparison_kind(expected[column], actual[column]),
+                     tolerance, relative_tolerance, datetime_tolerance)
+        for column in columns
+    ])
+
+    rows, cols = np.nonzero(~equal)
+    differences = []
+    for row, col in zip(rows[:max_differences], cols[:max_differences]):
+        label = f"key {expected.index[row]}" if keys else f"row {row}"
+        column = columns[col]
+        differences.append(f"{label}, column '{column}': expected {expected[column].iloc[row]!r}, "
+                           f"actual {actual[column].iloc[row]!r}")
+
+    return ComparisonResult(problems, differences, len(rows))
@@ -0,0 +1,237 @@
+from typing import Any, Dict, Iterator, List, Tuple
+from .lazy import LazyModule
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+alc = LazyModule("sqlalchemy")
+
+_EPOCH = "2000-01-01"
+_DATE_RANGE_SECONDS = 30 * 365 * 24 * 3600
+_DEFAULT_STRING_LENGTH = 12
+_DEFAULT_INTEGER_MAX = 1000000
+
+_INTEGER_MAXIMUMS = {
+    "TINYINT": 255,
+    "SMALLINT": 32767,
+    "INTEGER": 2 ** 31 - 1,
+    "INT": 2 ** 31 - 1,
+    "BIGINT": 2 ** 63 - 1
+}
+
+# SQL Server types that do not derive from the SQLAlchemy generic types, as (kind, precision, scale)
+_NAMED_TYPES = {
+    "MONEY": ("numeric", 19, 4),
+    "SMALLMONEY": ("numeric", 10, 4),
+    "UNIQUEIDENTIFIER": ("uuid", None, None)
+}
+
+# Server generated types that are never inserted
+_SERVER_GENERATED_TYPES = ("TIMESTAMP", "ROWVERSION")
+
+
+def _parse_distribution(spec: str):
+    name, _, args = spec.partition(":")
+    name = name.strip().lower()
+    if name == "choice":
+        return name, args.split("|")
+    if name == "constant":
+        return name, [args]
+    try:
+        return name, [float(arg) for arg in args.split(":") if arg != ""]
+    except ValueError:
+        raise RuntimeError(f"Invalid distribution '{spec}'")
+
+
+def describe_type(sql_type) -> Tuple[str, int, int, int, int]:
+    """Kind of values a SQL type holds, with its precision, scale, length and maximum where they apply"""
+    type_name = type(sql_type).__name__.upper()
+    if type_name in _NAMED_TYPES:
+        kind, precision, scale = _NAMED_TYPES[type_name]
+        return kind, precision, scale, None, None
+    if isinstance(sql_type, alc.types.Boolean):
+        return "boolean", None, None, None, None
+    if isinstance(sql_type, alc.types.Integer):
+        return "integer", None, None, None, _INTEGER_MAXIMUMS.get(type_name, _INTEGER_MAXIMUMS["INTEGER"])
+    if isinstance(sql_type, alc.types.Float):
+        return "float", None, None, None, None
+    if isinstance(sql_type, alc.types.Numeric):
+        return "numeric", sql_type.precision or 18, sql_type.scale or 0, None, None
+    if isinstance(sql_type, alc.types.DateTime):
+        return "datetime", None, None, None, None
+    if isinstance(sql_type, alc.types.Date):
+        return "date", None, None, None, None
+    if isinstance(sql_type, alc.types.Time):
+        return "time", None, None, None, None
+    if isinstance(sql_type, alc.types.String):
+        return "string", None, None, getattr(sql_type, "length", None), None
+    return None, None, None, None, None
+
+
+def is_integer_type(sql_type) -> bool:
+    return describe_type(sql_type)[0] == "integer"
+
+
+class _Column:
+
+    def __init__(self, metadata: Dict[str, Any], is_key: bool, distribution: str = None) -> None:
+        self.name = metadata["name"]
+        self.type = metadata["type"]
+        self.nullable = bool(metadata.get("nullable", True)) and not is_key
+        self.is_key = is_key
+        self.distribution = _parse_distribution(distribution) if distribution else None
+        self.kind, self.precision, self.scale, self.length, self.maximum = describe_type(self.type)
+
+        if self.kind is None and self.distribution is None:
+            raise RuntimeError(f"Cannot generate data for column '{self.name}' of type {self.type}")
+        if is_key and self.kind not in ("integer", "string", "uuid"):
+            raise RuntimeError(f"Cannot generate unique values for key column '{self.name}' of type {self.type}")
+
+    def bounds(self) -> Tuple[float, float]:
+        """Smallest and largest value an integer or decimal column holds"""
+        if self.kind == "integer":
+            return (0 if self.maximum == _INTEGER_MAXIMUMS["TINYINT"] else -self.maximum - 1), self.maximum
+        limit = (10 ** self.precision - 1) / 10 ** self.scale
+        return -limit, limit
+
+
+def is_generated_by_server(metadata: Dict[str, Any]) -> bool:
+    """Identity, computed and rowversion columns are filled in by SQL Server"""
+    # Metadata rows come from a Dataframe, so keys missing for a column are NaN rather than absent
+    return (metadata.get("autoincrement") is True or isinstance(metadata.get("identity"), dict)
+            or isinstance(metadata.get("computed"), dict)
+            or type(metadata["type"]).__name__.upper() in _SERVER_GENERATED_TYPES)
+
+
+class TableDataGenerator:
+    """Generate batches of random rows for a table from its column metadata with NumPy.
+
+    `distributions` maps column names to a distribution:
+    | `uniform:<low>:<high>` | uniformly distributed numbers                      |
+    | `normal:<mean>:<std>`  | normally distributed numbers                       |
+    | `sequence:<start>`     | consecutive integers                               |
+    | `choice:<a>|<b>|<c>`   | one of the given values                            |
+    | `constant:<value>`     | the same value on every row                        |
+
+    Key columns get unique values starting from `key_offsets` (default 0). Nullable columns are left
+    empty for `null_fraction` of the rows.
+    """
+
+    def __init__(self, columns: List[Dict[str, Any]], key_columns: List[str], distributions: Dict[str, str] = None,
+                 null_fraction: float = 0, seed: int = None, key_offsets: Dict[str, int] = None) -> None:
+        distributions = distributions or {}
+        unknown = set(distributions) - {c["name"] for c in columns}
+        if unknown:
+            raise RuntimeError(f"Distributions given for unknown columns: {sorted(unknown)}")
+
+        self.columns = [_Column(c, c["name"] in key_columns, distributions.get(c["name"]))
+                        for c in columns if not is_generated_by_server(c)]
+        self.null_fraction = null_fraction
+        self.key_offsets = dict(key_offsets or {})
+        self._rng = np.random.default_rng(seed)
+        self._generated = 0
+
+    def batches(self, row_count: int, batch_size: int) -> Iterator["pd.DataFrame"]:
+        for start in range(0, row_count, batch_size):
+            yield self.generate(min(batch_size, row_count - start))
+
+    def generate(self, size: int) -> "pd.DataFrame":
+        positions = np.arange(self._generated, self._generated + size, dtype="int64")
+        self._generated += size
+        data = {}
+        for column in self.columns:
+            values = self._values(column, size, positions)
+            if column.nullable and self.null_fraction > 0:
+                values = values.mask(self._rng.random(size) < self.null_fraction)
+            data[column.name] = values
+        return pd.DataFrame(data)
+
+    def _values(self, column: _Column, size: int, positions: "np.ndarray") -> "pd.Series":
+        if column.is_key:
+            return self._key_values(column, positions)
+        if column.distribution is not None:
+            return self._distribution_values(column, size)
+
+        rng = self._rng
+        if column.kind == "boolean":
+            return pd.Series(rng.random(size) < 0.5)
+        if column.kind == "integer":
+            high = min(column.maximum, _DEFAULT_INTEGER_MAX)
+            return pd.Series(rng.integers(0, high, size=size, endpoint=True), dtype="Int64")
+        if column.kind == "float":
+            return pd.Series(rng.random(size) * 1000)
+        if column.kind == "numeric":
+            # Whole numbers of the smallest unit, so rounding never carries past the precision of the column
+            digits = min(column.precision, 15)
+            return pd.Series(rng.integers(0, 10 ** digits, size=size) / 10 ** column.scale)
+        if column.kind in ("datetime", "date", "time"):
+            seconds = rng.integers(0, _DATE_RANGE_SECONDS, size=size)
+            timestamps = pd.Timestamp(_EPOCH) + pd.to_timedelta(seconds, unit="s")
+            if column.kind == "date":
+                return pd.Series(timestamps.normalize())
+            if column.kind == "time":
+                return pd.Series(timestamps.time)
+            return pd.Series(timestamps)
+        if column.kind == "uuid":
+            return self._uuid_values(size)
+        return self._string_values(column, size)
+
+    def _distribution_values(self, column: _Column, size: int) -> "pd.Series":
+        name, args = column.distribution
+        rng = self._rng
+        if name == "choice":
+            return pd.Series(np.asarray(args, dtype=object)[rng.integers(0, len(args), size=size)])
+        if name == "constant":
+            return pd.Series([args[0]] * size)
+        if name == "sequence":
+            start = int(args[0]) if args else 0
+            values = np.arange(start + self._generated - size, start + self._generated, dtype="int64")
+            if column.kind in ("integer", "numeric") and size:
+                low, high = column.bounds()
+                if values[0] < low or values[-1] > high:
+                    raise RuntimeError(f"Column '{column.name}' of type {column.type} cannot hold the sequence "
+                                       f"up to {values[-1]}")
+            return pd.Series(values)
+        if name == "uniform":
+            values = rng.uniform(args[0], args[1], size=size)
+        elif name == "normal":
+            values = rng.normal(args[0], args[1], size=size)
+        else:
+            raise RuntimeError(f"Unknown distribution '{name}' for column '{column.name}'")
+        if column.kind == "integer":
+            return pd.Series(np.clip(np.rint(values), *column.bounds()).astype("int64"))
+        if column.kind == "numeric":
+            return pd.Series(np.clip(np.round(values, column.scale), *column.bounds()))
+        return pd.Series(values)
+
+    def _key_values(self, column: _Column, positions: "np.ndarray") -> "pd.Series":
+        values = positions + self.key_offsets.get(column.name, 0)
+        if column.kind == "integer":
+            if values[-1] > column.maximum:
+                raise RuntimeError(f"Key column '{column.name}' cannot hold {values[-1]}")
+            return pd.Series(values)
+        if column.kind == "uuid":
+            return self._uuid_values(len(values))
+        width = column.length or _DEFAULT_STRING_LENGTH
+        keys = values.astype(str)
+        if len(keys[-1]) > width:
+            raise RuntimeError(f"Key column '{column.name}' of length {width} cannot hold {len(values)} unique values")
+        return pd.Series(np.char.zfill(keys, width))
+
+    def _string_values(self, column: _Column, size: int) -> "pd.Series":
+        width = min(column.length or _DEFAULT_STRING_LENGTH, _DEFAULT_STRING_LENGTH)
+        codes = self._rng.integers(ord("a"), ord("z"), size=(size, width), endpoint=True, dtype="uint8")
+        lengths = self._rng.integers(1, width, size=size, endpoint=True)
+        # Zero bytes past each length are dropped when viewed as fixed width byte strings
+        codes[np.arange(width) >= lengths[:, None]] = 0
+        return pd.Series(codes.view(f"S{width}").ravel().astype(str))
+
+    def _uuid_values(self, size: int) -> "pd.Series":
+        raw = self._rng.integers(0, 256, size=(size, 16), dtype="uint8")
+        raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+        raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+        # Spell out each nibble as a hex digit and insert the dashes, all as one byte matrix
+        digits = np.frombuffer(b"0123456789abcdef", dtype="uint8")
+        nibbles = np.stack([raw >> 4, raw & 0x0F], axis=2).reshape(size, 32)
+        text = np.full((size, 36), ord("-"), dtype="uint8")
+        text[:, [i for i in range(36) if i not in (8, 13, 18, 23)]] = digits[nibbles]
+        return pd.Series(text.view("S36").ravel().astype(str))
@@ -0,0 +1,96 @@
+import decimal
+import math
+from typing import Any, Dict, List
+from .generator import describe_type, is_generated_by_server
+
+# String columns up to this length (codes, flags, statuses) are read as categoricals
+CATEGORY_MAX_LENGTH = 10
+
+# Significant digits a float64 holds exactly, wider DECIMAL, NUMERIC and MONEY columns are read as Decimals
+FLOAT_MAX_PRECISION = 15
+
+_INTEGER_DTYPES = ((255, "UInt8"), (32767, "Int16"), (2 ** 31 - 1, "Int32"))
+
+
+def _integer_dtype(maximum: int) -> str:
+    for type_maximum, dtype in _INTEGER_DTYPES:
+        if maximum <= type_maximum:
+            return dtype
+    return "Int64"
+
+
+def _to_decimal(value: Any) -> Any:
+    """Read a value as an exact Decimal, an empty one as NULL"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        return decimal.Decimal(text)
+    except decimal.InvalidOperation:
+        raise ValueError(f"Cannot convert '{value}' to a decimal")
+
+
+def _is_wide_decimal(sql_type) -> bool:
+    kind, precision, scale, _, _ = describe_type(sql_type)
+    return kind == "numeric" and not (scale == 0 and precision <= 18) and precision > FLOAT_MAX_PRECISION
+
+
+def _dtype(sql_type) -> Any:
+    kind, precision, scale, length, maximum = describe_type(sql_type)
+    if kind == "integer":
+        return _integer_dtype(maximum)
+    if kind == "boolean":
+        return "boolean"
+    if kind == "float":
+        return "float64"
+    if kind == "numeric":
+        return "Int64" if scale == 0 and precision <= 18 else "float64"
+    if kind == "string" and length is not None and 0 < length <= CATEGORY_MAX_LENGTH:
+        return "category"
+    if kind in ("string", "uuid", "time"):
+        # Text stays text, e.g. codes with leading zeros are not read as numbers
+        return str
+    return None
+
+
+class ReadOptions:
+    """How to read a file into the column types of a table
+
+    `dtype`, `converters` and `parse_dates` go to `pd.read_csv` or `pd.read_excel`, `sql_types` to `to_sql`
+    so values are bound with the types of the table instead of types guessed from the data.
+    """
+
+    def __init__(self, columns: List[Dict[str, Any]], file_columns: List[str]) -> None:
+        table_columns = {c["name"].lower(): c for c in columns if not is_generated_by_server(c)}
+        self.dtype = {}
+        self.converters = {}
+        self.parse_dates = []
+        self.sql_types = {}
+        self.has_booleans = False
+
+        for file_column in file_columns:
+            column = table_columns.get(str(file_column).lower())
+            if column is None:
+                continue
+            self.sql_types[file_column] = column["type"]
+            kind = describe_type(column["type"])[0]
+            if kind in ("datetime", "date"):
+                self.parse_dates.append(file_column)
+                continue
+            if _is_wide_decimal(column["type"]):
+                self.converters[file_column] = _to_decimal
+                continue
+            dtype = _dtype(column["type"])
+            if dtype is not None:
+                self.dtype[file_column] = dtype
+                self.has_booleans = self.has_booleans or dtype == "boolean"
+
+    def read_options(self) -> Dict[str, Any]:
+        options = {"dtype": self.dtype, "converters": self.converters, "parse_dates": self.parse_dates}
+        if self.has_booleans:
+            # BIT columns are usually exported as 1 and 0
+            options.update(true_values=["1"], false_values=["0"])
+        return options
+
@@ -0,0 +1,39 @@
+import importlib
+import threading
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported when one of its attributes is first used.
+
+    pandas and SQLAlchemy take most of the time of importing the library, and are not needed for Libdoc,
+    dry-runs or suites that only use the SSIS keywords:
+
+    | pd = LazyModule("pandas")
+    | pd.DataFrame()  # pandas is imported here
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, name: str) -> None:
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self.__dict__["_module"] = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __setattr__(self, key, value):
+        setattr(self._load(), key, value)
+
+    def __dir__(self):
+        return dir(self._load())
@@ -1,15 +1,27 @@
 import collections
-from typing import List, Dict, Any
+import os
+import threading
+import time
+import weakref
+from datetime import timedelta
+from typing import List, Dict, Any, Iterator, Tuple
 
 from robot.api import logger
 from robot.api.deco import keyword
-import pandas as pd
-from .client import DatabaseClient, SSISClient
+from . import columnar, compare, generator, ingest, recording, snapshot
+from .cache import MetadataCache
+from .checkpoint import CheckpointStore, parse_watermark, previous_rowversion
+from .client import DatabaseClient, SSISClient, ResultBudget
+from .lazy import LazyModule
 from .version import VERSION
 
 __version__ = VERSION
 
-Config = collections.namedtuple('Config', 'use_pandas ssis_server dtexec_path')
+pd = LazyModule("pandas")
+
+Config = collections.namedtuple('Config', 'use_pandas ssis_server dtexec_path ssis_execution_mode cache_dir cache_ttl '
+                                         'max_result_rows max_result_bytes result_budget_mode recording_mode '
+                                         'recording_dir recording_mismatch checkpoint_file')
 
 
 class MicrosoftDataLibrary:
@@ -20,24 +32,58 @@ class MicrosoftDataLibrary:
     ROBOT_LIBRARY_SCOPE = 'GLOBAL'
     ROBOT_LIBRARY_VERSION = __version__
 
-    _PANDA_DATAFRAME_ROW_COUNT_SHAPE = 0
     _PANDA_DATAFRAME_COL_COUNT_SHAPE = 1
 
     _DEFAULT_USE_PANDAS = False
     _DEFAULT_SSIS_SERVER = "localhost"
     _DEFAULT_DTEXEC_PATH = "dtexec"
+    _DEFAULT_SSIS_EXECUTION_MODE = "dtexec"
+    _SSIS_EXECUTION_MODES = ("dtexec", "catalog")
+    _DEFAULT_SSIS_POLL_INTERVAL = 1.0
+    _DEFAULT_CACHE_TTL = 300
+    _DEFAULT_RESULT_BUDGET_MODE = "spill"
+    _RESULT_BUDGET_MODES = ("spill", "strict")
+    _DEFAULT_RECORDING_MODE = recording.OFF
+    _DEFAULT_RECORDING_MISMATCH = recording.FAIL
+    _DEFAULT_MAX_DIFFERENCES = 10
+    _DEFAULT_GENERATE_BATCH_SIZE = 100000
+    _DEFAULT_SSIS_EVENT_MESSAGE_TYPES = ("error", "taskfailed", "warning")
+    _SSIS_EVENT_MESSAGE_BATCH_SIZE = 10000
+
+    # Map catalog execution statuses onto the equivalent dtexec return codes
+    _SSIS_STATUS_RETURN_CODES = {3: 3, 4: 1, 6: 1, 7: 0, 9: 0}
 
     def __init__(self,
                  use_pandas: bool = _DEFAULT_USE_PANDAS,
                  ssis_server: str = _DEFAULT_SSIS_SERVER,
-                 dtexec_path: str = _DEFAULT_DTEXEC_PATH) -> None:
+                 dtexec_path: str = _DEFAULT_DTEXEC_PATH,
+                 ssis_execution_mode: str = _DEFAULT_SSIS_EXECUTION_MODE,
+                 cache_dir: str = None,
+                 cache_ttl: float = _DEFAULT_CACHE_TTL,
+                 max_result_rows: int = None,
+                 max_result_bytes: int = None,
+                 result_budget_mode: str = _DEFAULT_RESULT_BUDGET_MODE,
+                 recording_mode: str = _DEFAULT_RECORDING_MODE,
+                 recording_dir: str = None,
+                 recording_mismatch: str = _DEFAULT_RECORDING_MISMATCH,
+                 checkpoint_file: str = None) -> None:
         """MicrosoftDataLibrary allows some import time configuration to be set.
 
         The following parameters can be set:
-        | = Parameter = | = Description =                                          | = Default = |
-        | use_pandas    | if set to True, all results will be as a Pandas Datframe | $FALSE}     |
-        | ssis_server   | hostname of SSIS server                                  | localhost   |
-        | dtexec_path   | full path to dtexec binary                               | dtexec      |
+        | = Parameter =       | = Description =                                          | = Default = |
+        | use_pandas          | if set to True, all results will be as a Pandas Datframe | $FALSE}     |
+        | ssis_server         | hostname of SSIS server                                  | localhost   |
+        | dtexec_path         | full path to dtexec binary                               | dtexec      |
+        | ssis_execution_mode | `dtexec` or `catalog` (run packages through SSISDB)      | dtexec      |
+        | cache_dir           | directory to cache metadata and SSIS catalog lookups in  | None        |
+        | cache_ttl           | seconds a cached lookup stays valid                      | 300         |
+        | max_result_rows     | maximum number of records a query result keeps in memory | None        |
+        | max_result_bytes    | maximum size in bytes a query result keeps in memory     | None        |
+        | result_budget_mode  | `spill` to disk or fail (`strict`) when over the budget  | spill       |
+        | recording_mode      | `off`, `record` or `replay` database and SSIS answers    | off         |
+        | recording_dir       | directory to record answers in and replay them from      | None        |
+        | recording_mismatch  | `fail` or go `live` for calls missing from a recording   | fail        |
+        | checkpoint_file     | JSON file to keep table checkpoints in between runs      | None        |
 
         For example:
         | Library | MicrosoftDataLibrary |
@@ -47,18 +93,88 @@ class MicrosoftDataLibrary:
 
         You can also use named parameters:
         | Library | MicrosoftDataLibrary | use_pandas=${TRUE} | ssis_server=192.168.0.1 |
+
+        In `catalog` mode `Execute SSIS Package` runs packages through the SSIS catalog stored procedures
+        using the connection made with `Connect To SSIS Catalog`, so `dtexec` is not required:
+        | Library | MicrosoftDataLibrary | ssis_execution_mode=catalog |
+
+        The library can be used from several threads. Each thread has its own current connection, which
+        defaults to the current connection of the main thread until the thread connects or switches.
+
+        When `cache_dir` is set, table metadata, routine and SSIS catalog lookups are cached on disk.
+        Parallel workers (e.g. pabot processes) sharing the directory only run each lookup once:
+        | Library | MicrosoftDataLibrary | cache_dir=${TEMPDIR}/mdl-cache | cache_ttl=${600} |
+        `Execute Query`, `Execute Procedure`, `Truncate Table` and loading data drop the cached lookups of
+        their connection, changes made outside the library are seen after `cache_ttl` or `Clear Metadata Cache`.
+
+        With `max_result_rows` or `max_result_bytes` set, query results are read in chunks. A result that
+        grows past the budget is spilled to a temporary memory mapped file and returned as a lazy handle
+        supporting `len()`, indexing, slicing, iteration and comparison. In `strict` mode the keyword fails
+        instead. See `Set Result Budget`.
+        | Library | MicrosoftDataLibrary | max_result_bytes=${536870912} | result_budget_mode=strict |
+
+        In `record` mode the answers of all queries, catalog lookups and package runs are stored in
+        `recording_dir`, query results as compressed Feather files. In `replay` mode they are served from
+        there, so suites run offline without SQL Server or SSIS. Calls missing from the recording fail, or
+        with `recording_mismatch=live` are made against the live systems and added to the recording:
+        | Library | MicrosoftDataLibrary | recording_mode=replay | recording_dir=${CURDIR}/recordings |
+
+        Table checkpoints for `Read Table Changes` are kept in memory unless `checkpoint_file` is set, in
+        which case they carry over to later runs:
+        | Library | MicrosoftDataLibrary | checkpoint_file=${CURDIR}/checkpoints.json |
         """
 
+        ssis_execution_mode = (ssis_execution_mode or self._DEFAULT_SSIS_EXECUTION_MODE).lower()
+        if ssis_execution_mode not in self._SSIS_EXECUTION_MODES:
+            raise RuntimeError(f"Unknown SSIS execution mode '{ssis_execution_mode}', "
+                               f"expected one of {', '.join(self._SSIS_EXECUTION_MODES)}")
+
+        result_budget_mode = (result_budget_mode or self._DEFAULT_RESULT_BUDGET_MODE).lower()
+        if result_budget_mode not in self._RESULT_BUDGET_MODES:
+            raise RuntimeError(f"Unknown result budget mode '{result_budget_mode}', "
+                               f"expected one of {', '.join(self._RESULT_BUDGET_MODES)}")
+
+        recording_mode = (recording_mode or self._DEFAULT_RECORDING_MODE).lower()
+        if recording_mode not in recording.RECORDING_MODES:
+            raise RuntimeError(f"Unknown recording mode '{recording_mode}', "
+                               f"expected one of {', '.join(recording.RECORDING_MODES)}")
+        recording_mismatch = (recording_mismatch or self._DEFAULT_RECORDING_MISMATCH).lower()
+        if recording_mismatch not in recording.MISMATCH_POLICIES:
+            raise RuntimeError(f"Unknown recording mismatch policy '{recording_mismatch}', "
+                               f"expected one of {', '.join(recording.MISMATCH_POLICIES)}")
+        if recording_mode != recording.OFF and not recording_dir:
+            raise RuntimeError(f"Recording mode '{recording_mode}' requires a recording_dir")
+
         self._config = Config(
             use_pandas or self._DEFAULT_USE_PANDAS,
             ssis_server or self._DEFAULT_SSIS_SERVER,
-            dtexec_path or self._DEFAULT_DTEXEC_PATH
+            dtexec_path or self._DEFAULT_DTEXEC_PATH,
+            ssis_execution_mode,
+            cache_dir,
+            cache_ttl,
+            max_result_rows,
+            max_result_bytes,
+            result_budget_mode,
+            recording_mode,
+            recording_dir,
+            recording_mismatch,
+            checkpoint_file
         )
 
-        self._current_connection = None
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._default_connection = None
+        self._disconnected = weakref.WeakSet()
+        self._metadata_cache = MetadataCache(cache_dir, ttl=cache_ttl) if cache_dir else None
+        self._result_budget = self._new_result_budget(max_result_rows, max_result_bytes, result_budget_mode)
+        self._recording = None
+        if recording_mode != recording.OFF:
+            self._recording = recording.Recording(recording_dir, mode=recording_mode, on_mismatch=recording_mismatch)
+        self._checkpoints = CheckpointStore(checkpoint_file)
         self._connections = {}
         self._ssis_catalog_client = None
         self._ssis_exec_client = None
+        self._ssis_event_cursors = {}
 
     @property
     def ssis_catalog_client(self) -> DatabaseClient:
@@ -68,9 +184,42 @@ class MicrosoftDataLibrary:
 
     @property
     def ssis_exec_client(self) -> SSISClient:
-        if self._ssis_exec_client is None:
-            self._ssis_exec_client = SSISClient(self._config.ssis_server, self._config.dtexec_path)
-        return self._ssis_exec_client
+        with self._lock:
+            if self._ssis_exec_client is None:
+                if self._recording is not None:
+                    self._ssis_exec_client = recording.RecordingSSISClient(self._config.ssis_server, self._recording,
+                                                                           self._config.dtexec_path)
+                else:
+                    self._ssis_exec_client = SSISClient(self._config.ssis_server, self._config.dtexec_path)
+            return self._ssis_exec_client
+
+    @property
+    def _current_connection(self) -> DatabaseClient:
+        connection = getattr(self._local, "connection", self._default_connection)
+        # Another thread may have disconnected the connection this thread is on
+        return None if connection in self._disconnected else connection
+
+    @_current_connection.setter
+    def _current_connection(self, connection: DatabaseClient) -> None:
+        self._local.connection = connection
+        if threading.current_thread() is threading.main_thread():
+            self._default_connection = connection
+
+    @staticmethod
+    def _new_result_budget(max_rows: int, max_bytes: int, mode: str) -> ResultBudget:
+        if max_rows is None and max_bytes is None:
+            return None
+        return ResultBudget(max_rows, max_bytes, mode == "strict")
+
+    def _new_database_client(self, connection_string: str) -> DatabaseClient:
+        options = {}
+        if self._metadata_cache is not None:
+            options["metadata_cache"] = self._metadata_cache
+        if self._result_budget is not None:
+            options["result_budget"] = self._result_budget
+        if self._recording is not None:
+            return recording.RecordingDatabaseClient(connection_string, self._recording, **options)
+        return DatabaseClient(connection_string=connection_string, **options)
 
     @property
     def current_connection(self) -> DatabaseClient:
@@ -81,7 +230,8 @@ class MicrosoftDataLibrary:
     @keyword
     def number_of_connections(self) -> int:
         """Retrieve the number of registered connections"""
-        return len(self._connections)
+        with self._lock:
+            return len(self._connections)
 
     @keyword(types={"connection_name": str, "connection_string": str})
     def connect(self, connection_name: str, connection_string: str) -> None:
@@ -89,8 +239,10 @@ class MicrosoftDataLibrary:
 
         Multiple connections are possible, so a connection name is required to switch between them.
         """
-        self._connections[connection_name] = DatabaseClient(connection_string=connection_string)
-        self._current_connection = self._connections[connection_name]
+        client = self._new_database_client(connection_string)
+        with self._lock:
+            self._connections[connection_name] = client
+        self._current_connection = client
 
     @keyword
     def connect_with_config(self, connection_name: str, config: Dict[str, str]):
@@ -156,24 +308,30 @@ class MicrosoftDataLibrary:
 
         There can only be one connection at a time.
         """
-        self._ssis_catalog_client = DatabaseClient(connection_string=connection_string)
+        client = self._new_database_client(connection_string)
+        with self._lock:
+            self._ssis_catalog_client = client
 
     @keyword
     def disconnect_all(self) -> None:
         """Disconnect all registered connections, including any SSIS catalog connections"""
-        for connection in self._connections.values():
-            connection.disconnect()
-        self._connections.clear()
-        self._current_connection = None
+        with self._lock:
+            for connection in self._connections.values():
+                connection.disconnect()
+            self._connections.clear()
+            self._local = threading.local()
+            self._default_connection = None
 
-        self.disconnect_from_ssis_catalog()
+            self.disconnect_from_ssis_catalog()
 
     @keyword
     def disconnect_from_ssis_catalog(self):
         """Disconnect from the SSIS Database catalog"""
-        if self._ssis_catalog_client:
-            self._ssis_catalog_client.disconnect()
-            self._ssis_catalog_client = None
+        with self._lock:
+            if self._ssis_catalog_client:
+                self._ssis_catalog_client.disconnect()
+                self._ssis_catalog_client = None
+            self._ssis_event_cursors.clear()
 
     @keyword
     def disconnect(self) -> None:
@@ -183,7 +341,12 @@ class MicrosoftDataLibrary:
         except Exception as e:
             logger.error(e)
         finally:
-            del self._connections[self.current_connection_name()]
+            with self._lock:
+                connection = self._current_connection
+                del self._connections[self.current_connection_name()]
+                self._disconnected.add(connection)
+                if self._default_connection is connection:
+                    self._default_connection = None
             self._current_connection = None
 
     @keyword(types={"connection_name": str})
@@ -192,25 +355,56 @@ class MicrosoftDataLibrary:
 
         This will return the name of the active connection (if set)
         """
-        if connection_name in self._connections:
-            _current_connection_name = self.current_connection_name() if self._current_connection else ""
-            self._current_connection = self._connections[connection_name]
-            return _current_connection_name
+        with self._lock:
+            if connection_name in self._connections:
+                _current_connection_name = self.current_connection_name() if self._current_connection else ""
+                self._current_connection = self._connections[connection_name]
+                return _current_connection_name
 
         raise RuntimeError(f"Connection '{connection_name}' is not established in connection pool")
 
     @keyword
     def current_connection_name(self) -> str:
         """Get the current active connection name"""
-        for k, v in self._connections.items():
-            if v == self._current_connection:
-                return k
+        current_connection = self._current_connection
+        with self._lock:
+            for k, v in self._connections.items():
+                if v == current_connection:
+                    return k
         raise RuntimeError("No connection has been established")
 
     @keyword
     def list_connections(self) -> List[str]:
         """Get list of all registered connections."""
-        return list(self._connections.keys())
+        with self._lock:
+            return list(self._connections.keys())
+
+    @keyword(types={"max_rows": int, "max_bytes": int, "mode": str})
+    def set_result_budget(self, max_rows: int = None, max_bytes: int = None, mode: str = _DEFAULT_RESULT_BUDGET_MODE):
+        """Limit the number of records and bytes a query result may keep in memory, for all connections.
+
+        Results larger than the budget are spilled to a temporary memory mapped file when `mode` is
+        `spill`, and make the keyword fail when `mode` is `strict`. Without `max_rows` and `max_bytes`
+        the budget is removed. Spilled files are removed when the connection is disconnected.
+
+        | Set Result Budget | max_rows=${1000000} | max_bytes=${268435456} |
+        | ${rows}= | Read Table | dbo | FactSales |
+        | Length Should Be | ${rows} | 1200000 |
+        """
+        mode = mode.lower()
+        if mode not in self._RESULT_BUDGET_MODES:
+            raise RuntimeError(f"Unknown result budget mode '{mode}', "
+                               f"expected one of {', '.join(self._RESULT_BUDGET_MODES)}")
+        with self._lock:
+            self._result_budget = self._new_result_budget(max_rows, max_bytes, mode)
+            for connection in self._connections.values():
+                connection.result_budget = self._result_budget
+
+    @keyword
+    def clear_metadata_cache(self) -> None:
+        """Remove all cached metadata and SSIS catalog lookups, see `cache_dir` in `Importing`"""
+        if self._metadata_cache is not None:
+            self._metadata_cache.clear()
 
     @keyword(types={"query": str})
     def execute_query(self, query: str) -> None:
@@ -224,9 +418,34 @@ class MicrosoftDataLibrary:
 
     @keyword(types={"query": str})
     def read_query(self, query: str) -> Any:
-        """Execute query and return result set"""
-        df = self.current_connection.read_query(query)
-        return df if self._config.use_pandas else df.to_dict(orient="records")
+        """Execute query and return result set
+
+        A result set that was spilled to disk is returned as a lazy handle, see `Set Result Budget`.
+        """
+        df = self.current_connection.read_query_within_budget(query)
+        if self._config.use_pandas or isinstance(df, columnar.SpilledResult):
+            return df
+        return df.to_dict(orient="records")
+
+    @keyword(types={"query": str, "file_path": str, "file_format": str, "chunk_size": int})
+    def export_query_to_file(self, query: str, file_path: str, file_format: str = None,
+                             chunk_size: int = DatabaseClient.DEFAULT_CHUNK_SIZE) -> int:
+        """Stream the result set of a query to a file and return the number of exported records
+
+        Records are fetched and written `chunk_size` at a time, so memory use does not grow with the size
+        of the result set. The format is one of `csv`, `csv.gz`, `parquet` or `feather` and by default
+        it is determined from the file extension.
+
+        | ${rows}= | Export Query To File | SELECT * FROM dbo.DimCustomer | ${OUTPUT_DIR}/customers.csv.gz |
+        """
+        start = time.perf_counter()
+        row_count = self.current_connection.export_query_to_file(query, file_path=file_path,
+                                                                 file_format=file_format, chunk_size=chunk_size)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        megabytes = os.path.getsize(file_path) / (1024 * 1024)
+        logger.info(f"Exported {row_count} records ({megabytes:.2f} MB) to {file_path} in {elapsed:.2f} seconds: "
+                    f"{row_count / elapsed:.0f} records/s, {megabytes / elapsed:.2f} MB/s")
+        return row_count
 
     @keyword(types={"query": str})
     def read_scalar(self, query: str) -> str:
@@ -269,52 +488,396 @@ class MicrosoftDataLibrary:
         """Get number of records in table"""
         return int(self.read_scalar(self._table_select_count_statement(schema_name=schema_name, table_name=table_name)))
 
+    @keyword(types={"tables": str, "schema_name": str, "exact": bool})
+    def get_row_counts(self, *tables: str, schema_name: str = None, exact: bool = False) -> Dict[str, int]:
+        """Get the number of records of many tables at once, as a dictionary of `schema.table` to count
+
+        Give `tables` as `schema.table` names, or as table names within `schema_name`. Without `tables`
+        all tables in `schema_name` are counted. By default counts come from the partition metadata in
+        one query, which is instant but may lag behind uncommitted or very recent changes. With `exact`
+        the tables are counted with `UNION ALL` queries of up to 500 tables instead.
+
+        | &{counts}= | Get Row Counts | schema_name=dbo |
+        | &{counts}= | Get Row Counts | dbo.DimCustomer | stg.Customer | exact=True |
+        """
+        names = self._qualified_table_names(tables, schema_name)
+        if exact:
+            return self.current_connection.get_row_counts(names)
+
+        schema_names = sorted({name.split(".", 1)[0] for name in names})
+        counts = {name.lower(): count for name, count in
+                  self.current_connection.get_partition_row_counts(schema_names).items()}
+        missing = [name for name in names if name.lower() not in counts]
+        if missing:
+            raise RuntimeError(f"Tables not found: {missing}")
+        return {name: counts[name.lower()] for name in names}
+
+    @keyword(types={"tables": str, "schema_name": str, "exact": bool})
+    def tables_should_not_be_empty(self, *tables: str, schema_name: str = None, exact: bool = False) -> None:
+        """Assert that all tables contain records
+
+        Tables are counted at once, see `Get Row Counts`.
+
+        | Tables Should Not Be Empty | schema_name=dbo |
+        | Tables Should Not Be Empty | dbo.DimCustomer | stg.Customer | exact=True |
+        """
+        counts = self.get_row_counts(*tables, schema_name=schema_name, exact=exact)
+        empty_tables = [name for name, count in counts.items() if count <= 0]
+        if empty_tables:
+            raise AssertionError(f"{len(empty_tables)} of {len(counts)} tables are empty: {empty_tables}")
+
+    def _qualified_table_names(self, tables: Tuple[str, ...], schema_name: str) -> List[str]:
+        if not tables:
+            if schema_name is None:
+                raise RuntimeError("Give tables, a schema name or both")
+            tables = self.list_tables(schema_name=schema_name)
+        names = []
+        for table in tables:
+            if "." not in table:
+                if schema_name is None:
+                    raise RuntimeError(f"Table '{table}' needs a schema, give it as schema.table or set schema_name")
+                table = f"{schema_name}.{table}"
+            names.append(table)
+        return names
+
     @keyword(types={"query": str})
     def query_row_count(self, query: str) -> int:
-        """Get number of records from query"""
-        df = self.current_connection.read_query(query)
-        return df.shape[self._PANDA_DATAFRAME_ROW_COUNT_SHAPE]
+        """Get number of records from query
+
+        The result is counted chunk by chunk and does not count against the result budget.
+        """
+        return sum(len(chunk) for chunk in self.current_connection.iter_query(query))
+
+    @keyword(types={"schema_name": str, "table_name": str, "watermark_column": str, "value": str})
+    def set_table_checkpoint(self, schema_name: str, table_name: str, watermark_column: str,
+                             value: str = None) -> Any:
+        """Store a checkpoint for `Read Table Changes` and return its watermark value
+
+        The watermark column is a rowversion, timestamp or identity column that grows with every change.
+        By default the checkpoint is set at its current highest value, for a rowversion column just below
+        `MIN_ACTIVE_ROWVERSION()` so rows of transactions still in flight are not skipped. Otherwise it is
+        set at `value`, given as an integer, an ISO date/time or a `0x` prefixed hex rowversion. Checkpoints
+        are kept per connection and table.
+
+        | Set Table Checkpoint | dbo | FactSales | RowVersion |
+        | Execute SSIS Package | ${NIGHTLY_PACKAGE} |
+        | ${changes}=          | Read Table Changes | dbo | FactSales |
+        """
+        connection = self.current_connection
+        if value is None:
+            watermark, _ = self._watermark_bounds(connection, schema_name, table_name, watermark_column)
+        else:
+            watermark = parse_watermark(value)
+        self._checkpoints.set(connection.url, f"{schema_name}.{table_name}", watermark_column, watermark)
+        return watermark
+
+    @keyword(types={"schema_name": str, "table_name": str})
+    def get_table_checkpoint(self, schema_name: str, table_name: str) -> Any:
+        """Get the watermark value of a table checkpoint, or None when there is none"""
+        _, watermark = self._checkpoints.get(self.current_connection.url, f"{schema_name}.{table_name}")
+        return watermark
+
+    @keyword(types={"schema_name": str, "table_name": str})
+    def reset_table_checkpoint(self, schema_name: str, table_name: str) -> None:
+        """Remove a table checkpoint, so the next `Read Table Changes` reads the whole table"""
+        self._checkpoints.reset(self.current_connection.url, f"{schema_name}.{table_name}")
+
+    @keyword(types={"schema_name": str, "table_name": str, "watermark_column": str, "advance_checkpoint": bool,
+                    "chunk_size": int})
+    def read_table_changes(self, schema_name: str, table_name: str, watermark_column: str = None,
+                           advance_checkpoint: bool = True, chunk_size: int = DatabaseClient.DEFAULT_CHUNK_SIZE) -> Any:
+        """Read the records changed since the table checkpoint and move the checkpoint past them
+
+        Only records with a watermark after the checkpoint, up to the highest watermark when the read
+        starts, are read, `chunk_size` at a time, so the cost follows the size of the change rather than
+        of the table. Rowversions are read below `MIN_ACTIVE_ROWVERSION()` instead, as explained in
+        `Set Table Checkpoint`. Without a checkpoint `watermark_column` is required and the whole table is
+        read.
+        With `advance_checkpoint` set to false the checkpoint stays where it is.
+
+        | ${changes}= | Read Table Changes | dbo | FactSales |
+        """
+        df, column, until = self._read_table_changes(schema_name, table_name, watermark_column, chunk_size)
+        if advance_checkpoint and until is not None:
+            self._checkpoints.set(self.current_connection.url, f"{schema_name}.{table_name}", column, until)
+        return df if self._config.use_pandas else df.to_dict(orient="records")
+
+    @keyword(types={"schema_name": str, "table_name": str, "watermark_column": str, "keys": List[str],
+                    "ignore_order": bool, "tolerance": float, "advance_checkpoint": bool})
+    def table_changes_should_match(self, schema_name: str, table_name: str, expected_dataframe: "pd.DataFrame",
+                                   watermark_column: str = None, keys: List[str] = None, ignore_order: bool = False,
+                                   tolerance: float = 0, advance_checkpoint: bool = True) -> None:
+        """Assert that the records changed since the table checkpoint match the expected dataframe
+
+        Changes are read as in `Read Table Changes`. The checkpoint only moves past them once they match,
+        so a failed verification can be repeated. See `Dataframes Should Match` for `keys`, `ignore_order`
+        and `tolerance`.
+
+        | ${expected}= | Get Parquet | ${CURDIR}/expected_sales_delta.parquet |
+        | Table Changes Should Match | dbo | FactSales | ${expected} | keys=${{["SalesId"]}} |
+        """
+        df, column, until = self._read_table_changes(schema_name, table_name, watermark_column,
+                                                     DatabaseClient.DEFAULT_CHUNK_SIZE)
+        self.dataframes_should_match(expected_dataframe, df, keys=keys, ignore_order=ignore_order,
+                                     tolerance=tolerance)
+        if advance_checkpoint and until is not None:
+            self._checkpoints.set(self.current_connection.url, f"{schema_name}.{table_name}", column, until)
+
+    def _read_table_changes(self, schema_name: str, table_name: str, watermark_column: str, chunk_size: int):
+        connection = self.current_connection
+        column, after = self._checkpoints.get(connection.url, f"{schema_name}.{table_name}")
+        if watermark_column and column and watermark_column != column:
+            raise RuntimeError(f"Checkpoint of {schema_name}.{table_name} is on column '{column}', "
+                               f"not '{watermark_column}'. Reset it to change the watermark column.")
+        column = column or watermark_column
+        if column is None:
+            raise RuntimeError(f"No checkpoint for {schema_name}.{table_name}, give a watermark_column")
+
+        # Fix the upper bound first, so changes committed while reading are left for the next read
+        until, before = self._watermark_bounds(connection, schema_name, table_name, column)
+        if before is not None:
+            chunks = list(connection.iter_changes(schema_name, table_name, column, after=after, before=before,
+                                                  chunk_size=chunk_size))
+        else:
+            chunks = list(connection.iter_changes(schema_name, table_name, column, after=after, until=until,
+                                                  chunk_size=chunk_size))
+        df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+        logger.info(f"Read {len(df)} changed records from {schema_name}.{table_name} with {column} "
+                    f"after {after} up to {until}")
+        return df, column, until
+
+    @staticmethod
+    def _watermark_bounds(connection: DatabaseClient, schema_name: str, table_name: str, column: str):
+        # Transactions still in flight hold lower rowversions than rows committed after them, so rowversions
+        # are only read below the lowest active one, and the checkpoint is set just below it
+        if connection.is_rowversion_column(schema_name, table_name, column):
+            before = connection.get_min_active_rowversion()
+            return previous_rowversion(before), before
+        return connection.get_max_watermark(schema_name, table_name, column), None
 
     @keyword(types={"file_path": str, "sheet_name": str})
-    def get_xlsx(self, file_path: str, sheet_name: str) -> pd.DataFrame:
+    def get_xlsx(self, file_path: str, sheet_name: str) -> "pd.DataFrame":
         """Read contents of xlsx file into a Pandas Dataframe"""
         return pd.read_excel(file_path, sheet_name=sheet_name, index_col=None, header=0)
 
-    @keyword(types={"expected_dataframe": pd.DataFrame, "actual_dataframe": pd.DataFrame})
-    def dataframes_should_match(self, expected_dataframe: pd.DataFrame, actual_dataframe: pd.DataFrame):
-        """Assert that expected and actual dataframes are equal"""
-        if expected_dataframe.equals(actual_dataframe) is False:
-            raise AssertionError("Actual does not match expected.")
+    @keyword(types={"keys": List[str], "ignore_order": bool, "tolerance": float, "relative_tolerance": float,
+                    "datetime_tolerance": timedelta, "normalize_dtypes": bool, "max_differences": int})
+    def dataframes_should_match(self, expected_dataframe: "pd.DataFrame", actual_dataframe: "pd.DataFrame",
+                                keys: List[str] = None, ignore_order: bool = False, tolerance: float = 0,
+                                relative_tolerance: float = 0, datetime_tolerance: timedelta = None,
+                                normalize_dtypes: bool = True, max_differences: int = _DEFAULT_MAX_DIFFERENCES):
+        """Assert that expected and actual dataframes are equal
+
+        Rows are matched on the `keys` columns when given, otherwise by position. With `ignore_order`
+        both sides are sorted before they are compared by position. Numbers match when they differ by at
+        most `tolerance`, or by `relative_tolerance` times the expected value, and date/times when they
+        differ by at most `datetime_tolerance` (e.g. `1 second`).
+
+        With `normalize_dtypes` (the default) columns are compared by value, so an int64 column from XLSX
+        matches an Int32 or Decimal column from SQL Server. Disable it to also require equal dtypes.
+
+        On failure the message lists missing and unexpected rows and columns and the first
+        `max_differences` mismatching cells.
 
-    @keyword(types={"schema_name": str, "table_name": str, "file_path": str, "sheet_name": str})
-    def table_should_match_xlsx(self, schema_name: str, table_name: str, file_path: str, sheet_name: str):
-        """Assert that contents of database table match contents of XLSX"""
+        | Dataframes Should Match | ${expected} | ${actual} | keys=${key_columns} | tolerance=0.01 |
+        """
+        if isinstance(expected_dataframe, columnar.SpilledResult):
+            expected_dataframe = expected_dataframe.to_pandas()
+        if isinstance(actual_dataframe, columnar.SpilledResult):
+            actual_dataframe = actual_dataframe.to_pandas()
+
+        result = compare.compare_dataframes(expected_dataframe, actual_dataframe, keys=keys,
+                                            ignore_order=ignore_order, tolerance=tolerance,
+                                            relative_tolerance=relative_tolerance,
+                                            datetime_tolerance=datetime_tolerance,
+                                            normalize_dtypes=normalize_dtypes, max_differences=max_differences)
+        if not result.matches:
+            raise AssertionError(result.report())
+
+    @keyword(types={"schema_name": str, "table_name": str, "file_path": str, "sheet_name": str, "keys": List[str],
+                    "ignore_order": bool, "tolerance": float})
+    def table_should_match_xlsx(self, schema_name: str, table_name: str, file_path: str, sheet_name: str,
+                                keys: List[str] = None, ignore_order: bool = False, tolerance: float = 0):
+        """Assert that contents of database table match contents of XLSX
+
+        See `Dataframes Should Match` for `keys`, `ignore_order` and `tolerance`.
+        """
         xlsx_df = self.get_xlsx(file_path=file_path, sheet_name=sheet_name)
-        table_df = self.current_connection.read_query(self._table_select_statement(schema_name, table_name))
-        self.dataframes_should_match(xlsx_df, table_df)
+        table_df = self.current_connection.read_query_within_budget(
+            self._table_select_statement(schema_name, table_name))
+        self.dataframes_should_match(xlsx_df, table_df, keys=keys, ignore_order=ignore_order, tolerance=tolerance)
+
+    @keyword(types={"query": str, "file_path": str, "sheet_name": str, "keys": List[str], "ignore_order": bool,
+                    "tolerance": float})
+    def query_should_match_xlsx(self, query: str, file_path: str, sheet_name: str, keys: List[str] = None,
+                                ignore_order: bool = False, tolerance: float = 0):
+        """Assert that the result set of a query matches the contents of XLSX
 
-    @keyword(types={"query": str, "file_path": str, "sheet_name": str})
-    def query_should_match_xlsx(self, query: str, file_path: str, sheet_name: str):
-        """Assert that the result set of a query matches the contents of XLSX"""
+        See `Dataframes Should Match` for `keys`, `ignore_order` and `tolerance`.
+        """
         xlsx_df = self.get_xlsx(file_path=file_path, sheet_name=sheet_name)
-        table_df = self.current_connection.read_query(query)
-        self.dataframes_should_match(xlsx_df, table_df)
+        table_df = self.current_connection.read_query_within_budget(query)
+        self.dataframes_should_match(xlsx_df, table_df, keys=keys, ignore_order=ignore_order, tolerance=tolerance)
+
+    @keyword(types={"file_path": str, "columns": List[str]})
+    def get_parquet(self, file_path: str, columns: List[str] = None) -> "pd.DataFrame":
+        """Read contents of a Parquet file into a Pandas Dataframe
+
+        Column types stored in the file are kept. `columns` optionally restricts the columns read.
+        """
+        return columnar.read_columnar_file(file_path, columns=columns, file_format=columnar.PARQUET)
+
+    @keyword(types={"file_path": str, "columns": List[str]})
+    def get_feather(self, file_path: str, columns: List[str] = None) -> "pd.DataFrame":
+        """Read contents of a Feather (Arrow IPC) file into a Pandas Dataframe"""
+        return columnar.read_columnar_file(file_path, columns=columns, file_format=columnar.FEATHER)
+
+    @keyword(types={"schema_name": str, "table_name": str, "file_path": str, "keys": List[str],
+                    "ignore_order": bool, "tolerance": float})
+    def table_should_match_parquet(self, schema_name: str, table_name: str, file_path: str,
+                                   keys: List[str] = None, ignore_order: bool = False, tolerance: float = 0):
+        """Assert that contents of database table match contents of a Parquet file
 
-    def _load_table_with_dataframe(self, df: pd.DataFrame, schema_name: str, table_name: str) -> int:
-        self.current_connection.load_df(df=df, schema_name=schema_name, table_name=table_name)
+        See `Dataframes Should Match` for `keys`, `ignore_order` and `tolerance`.
+        """
+        parquet_df = self.get_parquet(file_path=file_path)
+        table_df = self.current_connection.read_query_within_budget(
+            self._table_select_statement(schema_name, table_name))
+        self.dataframes_should_match(parquet_df, table_df, keys=keys, ignore_order=ignore_order,
+                                     tolerance=tolerance)
+
+    @keyword(types={"schema_name": str, "table_name": str, "file_path": str, "keys": List[str],
+                    "ignore_order": bool, "tolerance": float})
+    def table_should_match_feather(self, schema_name: str, table_name: str, file_path: str,
+                                   keys: List[str] = None, ignore_order: bool = False, tolerance: float = 0):
+        """Assert that contents of database table match contents of a Feather file
+
+        See `Dataframes Should Match` for `keys`, `ignore_order` and `tolerance`.
+        """
+        feather_df = self.get_feather(file_path=file_path)
+        table_df = self.current_connection.read_query_within_budget(
+            self._table_select_statement(schema_name, table_name))
+        self.dataframes_should_match(feather_df, table_df, keys=keys, ignore_order=ignore_order,
+                                     tolerance=tolerance)
+
+    def _load_table_with_dataframe(self, df: "pd.DataFrame", schema_name: str, table_name: str,
+                                   sql_types: Dict[str, Any] = None) -> int:
+        self.current_connection.load_df(df=df, schema_name=schema_name, table_name=table_name, dtype=sql_types)
         return self.table_row_count(schema_name=schema_name, table_name=table_name)
 
+    def _read_typed_file(self, read, file_path: str, schema_name: str, table_name: str, **kwargs):
+        """Read a CSV or XLSX file into the column types of a table, returning the file and its SQL types"""
+        columns = self.current_connection.get_table_metadata(schema_name=schema_name, table_name=table_name)
+        file_columns = list(read(file_path, nrows=0, **kwargs).columns)
+        options = ingest.ReadOptions(columns.to_dict(orient="records"), file_columns)
+        try:
+            df = read(file_path, header=0, **kwargs, **options.read_options())
+        except (ValueError, TypeError) as e:
+            raise RuntimeError(f"Cannot read {file_path} into the column types of {schema_name}.{table_name}: {e}")
+        return df, options.sql_types
+
+    def _load_table_with_dataframes(self, dfs: Iterator["pd.DataFrame"], schema_name: str, table_name: str) -> int:
+        for df in dfs:
+            self.current_connection.load_df(df=df, schema_name=schema_name, table_name=table_name)
+        return self.table_row_count(schema_name=schema_name, table_name=table_name)
+
+    @keyword(types={"schema_name": str, "table_name": str, "file_path": str, "use_table_types": bool})
+    def load_table_with_csv(self, schema_name: str, table_name: str, file_path: str,
+                            use_table_types: bool = True) -> int:
+        """Append CSV to table and return the total number of records in the table
+
+        With `use_table_types` the file is read straight into the column types of the table: integers
+        as fixed width integers, decimals wider than 15 digits as exact Decimals, dates as dates, short
+        strings as categoricals and other text as text. The values are inserted with the SQL types of the table. The table metadata is looked up with
+        `Get Table Metadata`, which is cached when `cache_dir` is set. Set `use_table_types` to false to
+        infer the types from the data instead.
+        """
+        if not use_table_types:
+            return self._load_table_with_dataframe(pd.read_csv(file_path, header=0), schema_name, table_name)
+        df, sql_types = self._read_typed_file(pd.read_csv, file_path, schema_name, table_name)
+        return self._load_table_with_dataframe(df, schema_name, table_name, sql_types=sql_types)
+
+    @keyword(types={"schema_name": str, "table_name": str, "file_path": str, "sheet_name": str,
+                    "use_table_types": bool})
+    def load_table_with_xlsx(self, schema_name: str, table_name: str, file_path: str, sheet_name: str,
+                             use_table_types: bool = True) -> int:
+        """Append XLSX to table and return the total number of records in the table
+
+        See `Load Table With CSV` for `use_table_types`.
+        """
+        if not use_table_types:
+            df = self.get_xlsx(file_path=file_path, sheet_name=sheet_name)
+            return self._load_table_with_dataframe(df, schema_name, table_name)
+        df, sql_types = self._read_typed_file(pd.read_excel, file_path, schema_name, table_name,
+                                              sheet_name=sheet_name, index_col=None)
+        return self._load_table_with_dataframe(df, schema_name, table_name, sql_types=sql_types)
+
     @keyword(types={"schema_name": str, "table_name": str, "file_path": str})
-    def load_table_with_csv(self, schema_name: str, table_name: str, file_path: str) -> int:
-        """Append CSV to table and return the total number of records in the table"""
-        df = pd.read_csv(filepath_or_buffer=file_path, header=0)
-        return self._load_table_with_dataframe(df, schema_name, table_name)
+    def load_table_with_parquet(self, schema_name: str, table_name: str, file_path: str) -> int:
+        """Append Parquet file to table and return the total number of records in the table
 
-    @keyword(types={"schema_name": str, "table_name": str, "file_path": str, "sheet_name": str})
-    def load_table_with_xlsx(self, schema_name: str, table_name: str, file_path: str, sheet_name: str) -> int:
-        """Append XLSX to table and return the total number of records in the table"""
-        df = self.get_xlsx(file_path=file_path, sheet_name=sheet_name)
-        return self._load_table_with_dataframe(df, schema_name, table_name)
+        The file is loaded one row group at a time, so large files do not have to fit in memory.
+        """
+        dfs = columnar.iter_parquet(file_path)
+        return self._load_table_with_dataframes(dfs, schema_name, table_name)
+
+    @keyword(types={"schema_name": str, "table_name": str, "file_path": str})
+    def load_table_with_feather(self, schema_name: str, table_name: str, file_path: str) -> int:
+        """Append Feather (Arrow IPC) file to table and return the total number of records in the table
+
+        The file is memory mapped and loaded one record batch at a time.
+        """
+        dfs = columnar.iter_feather(file_path)
+        return self._load_table_with_dataframes(dfs, schema_name, table_name)
+
+    @keyword(types={"schema_name": str, "table_name": str, "row_count": int, "seed": int,
+                    "distributions": Dict[str, str], "null_fraction": float, "batch_size": int})
+    def generate_table_data(self, schema_name: str, table_name: str, row_count: int, seed: int = None,
+                            distributions: Dict[str, str] = None, null_fraction: float = 0,
+                            batch_size: int = _DEFAULT_GENERATE_BATCH_SIZE) -> int:
+        """Append `row_count` random records to a table and return the total number of records in the table
+
+        Values are generated from the table metadata, `batch_size` records at a time, and fit the column
+        types. Identity, computed and rowversion columns are left to the server. Primary key columns get
+        unique values following the existing ones. Nullable columns are left empty for `null_fraction` of
+        the records. The same `seed` generates the same data.
+
+        `distributions` overrides the values of single columns with one of `uniform:<low>:<high>`,
+        `normal:<mean>:<std>`, `sequence:<start>`, `choice:<a>|<b>|<c>` or `constant:<value>`.
+
+        | &{dist}= | Create Dictionary | Country=choice:NL|BE|DE | Amount=normal:100:15 |
+        | ${rows}= | Generate Table Data | dbo | FactSales | 1000000 | seed=42 | distributions=${dist} |
+        """
+        connection = self.current_connection
+        columns = connection.get_table_metadata(schema_name=schema_name, table_name=table_name)
+        key_columns = connection.get_primary_key(schema_name=schema_name, table_name=table_name)
+        table_generator = generator.TableDataGenerator(columns.to_dict(orient="records"), key_columns,
+                                                       distributions=distributions, null_fraction=null_fraction,
+                                                       seed=seed, key_offsets=self._key_offsets(
+                                                           columns, key_columns, schema_name, table_name))
+        start = time.perf_counter()
+        for df in table_generator.batches(row_count, batch_size):
+            connection.load_df(df=df, schema_name=schema_name, table_name=table_name)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        logger.info(f"Generated {row_count} records into {schema_name}.{table_name} in {elapsed:.2f} seconds: "
+                    f"{row_count / elapsed:.0f} records/s")
+        return self.table_row_count(schema_name=schema_name, table_name=table_name)
+
+    def _key_offsets(self, columns: "pd.DataFrame", key_columns: List[str], schema_name: str,
+                     table_name: str) -> Dict[str, int]:
+        """Integer keys continue after the current maximum, other keys after the current row count"""
+        offsets = {}
+        row_count = None
+        integer_columns = {c["name"] for c in columns.to_dict(orient="records") if generator.is_integer_type(c["type"])}
+        for column in key_columns:
+            if column in integer_columns:
+                maximum = self.read_scalar(f"SELECT MAX({column}) FROM {schema_name}.{table_name}")
+                offsets[column] = 0 if pd.isna(maximum) else int(maximum) + 1
+            else:
+                if row_count is None:
+                    row_count = self.table_row_count(schema_name=schema_name, table_name=table_name)
+                offsets[column] = row_count
+        return offsets
 
     @keyword(types={"schema_name": str, "table_name": str})
     def get_table_metadata(self, schema_name: str, table_name: str) -> List[Dict[str, str]]:
@@ -322,6 +885,61 @@ class MicrosoftDataLibrary:
         df = self.current_connection.get_table_metadata(schema_name=schema_name, table_name=table_name)
         return df.to_dict(orient="records")
 
+    @keyword(types={"file_path": str, "schema_name": str})
+    def snapshot_schema(self, file_path: str = None, schema_name: str = None) -> Dict[str, Any]:
+        """Capture columns, types, keys and indexes of all tables in the database, or in `schema_name`
+
+        The snapshot is read with a few bulk catalog queries, whatever the number of tables. It is saved as
+        gzipped JSON when `file_path` is given, to compare against later with `Schemas Should Match`.
+
+        | Snapshot Schema | ${OUTPUT_DIR}/prod_schema.json.gz |
+        """
+        schema_snapshot = self.current_connection.get_schema_snapshot(schema_name=schema_name)
+        if file_path:
+            snapshot.save_snapshot(schema_snapshot, file_path)
+            logger.info(f"Saved snapshot of {len(schema_snapshot['tables'])} tables to {file_path}")
+        return schema_snapshot
+
+    @keyword(types={"schema_name": str, "max_differences": int})
+    def schemas_should_match(self, expected: Any, actual: Any = None, schema_name: str = None,
+                             max_differences: int = _DEFAULT_MAX_DIFFERENCES) -> None:
+        """Assert that two database schemas have the same tables, columns, keys and indexes
+
+        `expected` and `actual` are each a connection name, a snapshot file saved by `Snapshot Schema` or a
+        snapshot returned by it. `actual` defaults to the current connection. Constraint names are not
+        compared, as SQL Server generates them per database. At most `max_differences` are reported.
+
+        | Schemas Should Match | dev | prod | schema_name=dbo |
+        | Schemas Should Match | ${CURDIR}/baseline_schema.json.gz |
+        """
+        differences = snapshot.diff_snapshots(self._schema_snapshot(expected, schema_name),
+                                              self._schema_snapshot(actual, schema_name))
+        if differences:
+            shown = differences[:max_differences]
+            raise AssertionError("\n".join([f"Actual schema does not match expected. {len(differences)} "
+                                             f"difference(s), showing the first {len(shown)}:"] + shown))
+
+    def _schema_snapshot(self, source: Any, schema_name: str) -> Dict[str, Any]:
+        if source is None:
+            schema_snapshot = self.current_connection.get_schema_snapshot(schema_name=schema_name)
+        elif isinstance(source, dict):
+            schema_snapshot = source
+        else:
+            with self._lock:
+                connection = self._connections.get(source)
+            if connection is not None:
+                schema_snapshot = connection.get_schema_snapshot(schema_name=schema_name)
+            elif os.path.isfile(source):
+                schema_snapshot = snapshot.load_snapshot(source)
+            else:
+                raise RuntimeError(f"'{source}' is neither a connection nor a schema snapshot file")
+
+        if schema_name is None:
+            return schema_snapshot
+        prefix = f"{schema_name}."
+        return dict(schema_snapshot, tables={name: table for name, table in schema_snapshot["tables"].items()
+                                             if name.startswith(prefix)})
+
     @keyword(types={"schema_name": str, "table_name": str})
     def truncate_table(self, schema_name: str, table_name: str) -> None:
         """Truncate a table"""
@@ -384,9 +1002,181 @@ class MicrosoftDataLibrary:
         """List all SSIS packages"""
         return self.ssis_catalog_client.list_all_ssis_packages()
 
+    @staticmethod
+    def _split_ssis_package_path(package_path: str) -> List[str]:
+        parts = [part for part in package_path.replace("/", "\\").split("\\") if part]
+        if len(parts) == 4 and parts[0].upper() == "SSISDB":
+            parts = parts[1:]
+        if len(parts) != 3:
+            raise RuntimeError(f"SSIS package path '{package_path}' is not of the form "
+                               f"\\SSISDB\\<folder>\\<project>\\<package>")
+        return parts
+
+    @keyword(types={"folder_name": str, "project_name": str, "package_name": str, "parameters": Dict[str, Any],
+                    "use32bitruntime": bool, "reference_id": int})
+    def start_ssis_package_execution(self, folder_name: str, project_name: str, package_name: str,
+                                     parameters: Dict[str, Any] = None, use32bitruntime: bool = False,
+                                     reference_id: int = None) -> int:
+        """Start a SSIS package through the SSIS catalog and return the execution id without waiting.
+
+        Parameter names follow the `dtexec` convention and are prefixed with `$Project::`, `$Package::`
+        or `$ServerOption::`. Names without a prefix are treated as package parameters.
+
+        | ${id}= | Start SSIS Package Execution | AdventureWorksSSIS | ETL | CopyFactSales.dtsx |
+        | ${params}= | Create Dictionary | $Project::BatchSize=${1000} | $ServerOption::LOGGING_LEVEL=${3} |
+        | ${id}= | Start SSIS Package Execution | AdventureWorksSSIS | ETL | CopyFactSales.dtsx | ${params} |
+        """
+        client = self.ssis_catalog_client
+        execution_id = client.create_ssis_execution(folder_name=folder_name, project_name=project_name,
+                                                    package_name=package_name, use32bitruntime=use32bitruntime,
+                                                    reference_id=reference_id)
+
+        for name, value in (parameters or {}).items():
+            object_prefix, _, parameter_name = name.rpartition("::")
+            object_type = client.SSIS_PARAMETER_OBJECT_TYPES.get(object_prefix or "$Package")
+            if object_type is None:
+                raise RuntimeError(f"Unknown SSIS parameter type '{object_prefix}' for parameter '{name}'")
+            client.set_ssis_execution_parameter_value(execution_id=execution_id, object_type=object_type,
+                                                      parameter_name=parameter_name, parameter_value=value)
+
+        client.start_ssis_execution(execution_id)
+        logger.info(f"Started SSIS execution {execution_id} of {folder_name}\\{project_name}\\{package_name}")
+        return execution_id
+
+    @keyword(types={"execution_id": int})
+    def get_ssis_execution_status(self, execution_id: int) -> str:
+        """Get the status of a SSIS catalog execution, e.g. `running`, `succeeded` or `failed`"""
+        status = self.ssis_catalog_client.get_ssis_execution_status(execution_id)
+        return DatabaseClient.SSIS_EXECUTION_STATUSES.get(status, str(status))
+
+    @staticmethod
+    def _ssis_message_type_ids(message_types: List[Any]) -> List[int]:
+        type_ids = []
+        for message_type in message_types or []:
+            if isinstance(message_type, int) or str(message_type).isdigit():
+                type_ids.append(int(message_type))
+                continue
+            type_name = str(message_type).replace(" ", "").replace("_", "").lower()
+            if type_name not in DatabaseClient.SSIS_MESSAGE_TYPES:
+                raise RuntimeError(f"Unknown SSIS message type '{message_type}'")
+            type_ids.append(DatabaseClient.SSIS_MESSAGE_TYPES[type_name])
+        return sorted(set(type_ids))
+
+    @staticmethod
+    def _log_ssis_event_messages(df: "pd.DataFrame") -> None:
+        type_names = {v: k for k, v in DatabaseClient.SSIS_MESSAGE_TYPES.items()}
+        lines = []
+        for message in df.to_dict(orient="records"):
+            line = (f"[{message['message_time']}] {type_names.get(message['message_type'], message['message_type'])} "
+                    f"{message['message_source_name']}: {message['message']}")
+            if message["message_type"] in (DatabaseClient.SSIS_MESSAGE_TYPES["error"],
+                                           DatabaseClient.SSIS_MESSAGE_TYPES["taskfailed"]):
+                logger.error(line)
+            elif message["message_type"] == DatabaseClient.SSIS_MESSAGE_TYPES["warning"]:
+                logger.warn(line)
+            else:
+                lines.append(line)
+        if lines:
+            logger.info("\n".join(lines))
+
+    def _read_new_ssis_event_messages(self, execution_id: int, message_types: List[Any]) -> "pd.DataFrame":
+        type_ids = self._ssis_message_type_ids(message_types)
+        cursor_key = (execution_id, tuple(type_ids))
+        frames = []
+        while True:
+            df = self.ssis_catalog_client.read_ssis_event_messages(
+                execution_id,
+                after_event_message_id=self._ssis_event_cursors.get(cursor_key, 0),
+                message_types=type_ids,
+                batch_size=self._SSIS_EVENT_MESSAGE_BATCH_SIZE)
+            if df.empty:
+                break
+            self._log_ssis_event_messages(df)
+            self._ssis_event_cursors[cursor_key] = int(df["event_message_id"].max())
+            frames.append(df)
+            if len(df) < self._SSIS_EVENT_MESSAGE_BATCH_SIZE:
+                break
+        return pd.concat(frames, ignore_index=True) if frames else df
+
+    @keyword(types={"execution_id": int, "message_types": List[str]})
+    def get_new_ssis_event_messages(self, execution_id: int, message_types: List[str] = None) -> Any:
+        """Read the SSIS catalog event messages of an execution that arrived since the previous call.
+
+        The messages are written to the log as they are read. Errors and task failures are logged as
+        errors and warnings as warnings. A cursor on `event_message_id` is kept for every execution and
+        set of message types, so repeated calls only read new messages from `catalog.event_messages`.
+
+        `message_types` can contain message type names such as `Error`, `Warning`, `Information` or
+        `TaskFailed` or their numeric values. By default all messages are read.
+
+        | ${execution_id}= | Start SSIS Package Execution | AdventureWorksSSIS | ETL | CopyFactSales.dtsx |
+        | ${types}= | Create List | Error | Warning |
+        | ${messages}= | Get New SSIS Event Messages | ${execution_id} | ${types} |
+        """
+        df = self._read_new_ssis_event_messages(execution_id, message_types)
+        return df if self._config.use_pandas else df.to_dict(orient="records")
+
+    @keyword(types={"execution_id": int})
+    def reset_ssis_event_message_cursor(self, execution_id: int) -> None:
+        """Forget which event messages of an execution have been read, so they are read again"""
+        for cursor_key in [k for k in self._ssis_event_cursors if k[0] == execution_id]:
+            del self._ssis_event_cursors[cursor_key]
+
+    def _wait_for_ssis_execution(self, execution_id: int, timeout: float, poll_interval: float,
+                                 message_types: List[Any] = None) -> int:
+        deadline = time.monotonic() + timeout
+        while True:
+            status = self.ssis_catalog_client.get_ssis_execution_status(execution_id)
+            if message_types:
+                self._read_new_ssis_event_messages(execution_id, message_types)
+            if status in DatabaseClient.SSIS_FINISHED_STATUSES:
+                return status
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"SSIS execution {execution_id} did not finish within {timeout} seconds")
+            if self._recording is None or not self._recording.replaying:
+                # Replayed statuses follow the recorded progress without waiting for it
+                time.sleep(poll_interval)
+
+    @keyword(types={"execution_id": int, "timeout": float, "poll_interval": float, "log_event_messages": bool})
+    def wait_for_ssis_execution(self, execution_id: int, timeout: float = 3600,
+                                poll_interval: float = _DEFAULT_SSIS_POLL_INTERVAL,
+                                log_event_messages: bool = False) -> str:
+        """Poll a SSIS catalog execution until it has finished and return its final status.
+
+        A `RuntimeError` is raised when the execution has not finished within `timeout` seconds.
+
+        When `log_event_messages` is set, new error, task failure and warning event messages are
+        written to the log on every poll, see `Get New SSIS Event Messages`.
+        """
+        message_types = self._DEFAULT_SSIS_EVENT_MESSAGE_TYPES if log_event_messages else None
+        status = self._wait_for_ssis_execution(execution_id, timeout=timeout, poll_interval=poll_interval,
+                                               message_types=message_types)
+        status_name = DatabaseClient.SSIS_EXECUTION_STATUSES[status]
+        logger.info(f"SSIS execution {execution_id} finished with status: {status_name}")
+        return status_name
+
+    def _execute_ssis_catalog_package(self, package_path: str) -> int:
+        folder_name, project_name, package_name = self._split_ssis_package_path(package_path)
+        execution_id = self.start_ssis_package_execution(folder_name, project_name, package_name)
+        status = self._wait_for_ssis_execution(execution_id, timeout=float("inf"),
+                                               poll_interval=self._DEFAULT_SSIS_POLL_INTERVAL,
+                                               message_types=self._DEFAULT_SSIS_EVENT_MESSAGE_TYPES)
+        logger.info(f"SSIS execution {execution_id} finished with status: "
+                    f"{DatabaseClient.SSIS_EXECUTION_STATUSES[status]}")
+        return self._SSIS_STATUS_RETURN_CODES[status]
+
     @keyword(types={"package_path": str})
     def execute_ssis_package(self, package_path: str) -> int:
-        """Execute a SSIS package stored on the Server"""
+        """Execute a SSIS package stored on the Server
+
+        Depending on the `ssis_execution_mode` import setting the package is run with `dtexec` or
+        through the SSIS catalog. Either way the `dtexec` return code is returned.
+        """
+
+        if self._config.ssis_execution_mode == "catalog":
+            rc = self._execute_ssis_catalog_package(package_path)
+            logger.info(f"Return Code: {rc} - {SSISClient.RETURN_CODES[rc]}")
+            return rc
 
         completed_process = self.ssis_exec_client.execute_server_package(package_path)
 
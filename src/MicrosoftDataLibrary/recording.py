@@ -0,0 +1,366 @@
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import subprocess
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+from . import columnar
+from .client import DatabaseClient, SSISClient
+from .lazy import LazyModule
+
+pd = LazyModule("pandas")
+alc = LazyModule("sqlalchemy")
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+RECORDING_MODES = (OFF, RECORD, REPLAY)
+
+FAIL = "fail"
+LIVE = "live"
+MISMATCH_POLICIES = (FAIL, LIVE)
+
+# Storage formats of recorded answers
+_JSON = "json"
+_FEATHER = "feather"
+_PICKLE = "pickle"
+_PICKLED_CHUNKS = "pickled_chunks"
+_PROCESS = "process"
+
+
+def normalize_sql(query: str) -> str:
+    return " ".join(query.split()).rstrip(";")
+
+
+class Recording:
+    """Recorded answers of database and SSIS calls in a directory, for replaying test runs offline.
+
+    Every answer is stored under a hash of the connection, operation and arguments, with SQL whitespace
+    normalized. Query results are stored as zstd compressed Feather files, written chunk by chunk as
+    streamed results go by, other answers as JSON, or pickled when they are not JSON serializable. Calls repeated with the same arguments are recorded
+    in sequence and replayed in the same sequence, the last answer repeating once it runs out, so e.g.
+    polling an execution status replays the recorded progress.
+
+    In replay mode a call that was not recorded fails, or with the `live` mismatch policy goes to the
+    live system and is recorded.
+    """
+
+    def __init__(self, directory: str, mode: str = RECORD, on_mismatch: str = FAIL) -> None:
+        self.directory = os.path.abspath(directory)
+        self.mode = mode
+        self.on_mismatch = on_mismatch
+        self._lock = threading.Lock()
+        self._occurrences = {}
+        self._local = threading.local()
+        try:
+            columnar.import_pyarrow()
+            self._columnar = True
+        except RuntimeError:
+            self._columnar = False
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __repr__(self):
+        return f"Recording({self.directory}, mode={self.mode})"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def _next_path(self, namespace: str, operation: str, args: List[Any]) -> Tuple[str, str, int]:
+        key = json.dumps([namespace, operation, args], default=str, sort_keys=True)
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        with self._lock:
+            occurrence = self._occurrences.get(digest, 0)
+            self._occurrences[digest] = occurrence + 1
+        return os.path.join(self.directory, digest), key, occurrence
+
+    def _find(self, base_path: str, occurrence: int) -> str:
+        for n in range(occurrence, -1, -1):
+            meta_path = f"{base_path}-{n}.json"
+            if os.path.exists(meta_path):
+                return meta_path
+        return None
+
+    def answer(self, namespace: str, operation: str, args: List[Any], call: Callable[[], Any]) -> Any:
+        """Replay the recorded answer of a call, or make the call and record its answer"""
+        if getattr(self._local, "depth", 0):
+            # Calls made while answering another call are part of that answer
+            return call()
+
+        base_path, key, occurrence = self._next_path(namespace, operation, args)
+        if self.replaying:
+            meta_path = self._find(base_path, occurrence)
+            if meta_path is not None:
+                return self._load(meta_path)
+            self._mismatch(key)
+
+        self._local.depth = 1
+        try:
+            value = call()
+        finally:
+            self._local.depth = 0
+        self._store(f"{base_path}-{occurrence}", key, value)
+        return value
+
+    def answer_chunks(self, namespace: str, operation: str, args: List[Any],
+                      call: Callable[[], Iterator["pd.DataFrame"]]) -> Iterator["pd.DataFrame"]:
+        """Like `answer` for calls returning Dataframes in chunks, which are recorded and replayed as a stream"""
+        if getattr(self._local, "depth", 0):
+            yield from call()
+            return
+
+        base_path, key, occurrence = self._next_path(namespace, operation, args)
+        if self.replaying:
+            meta_path = self._find(base_path, occurrence)
+            if meta_path is not None:
+                yield from self._load_chunks(meta_path)
+                return
+            self._mismatch(key)
+
+        path = f"{base_path}-{occurrence}"
+        recorder = _ChunkRecorder(path, self._columnar)
+        try:
+            for chunk in call():
+                recorder.write(chunk)
+                yield chunk
+        except BaseException:
+            # Only a result that was read to the end is recorded
+            recorder.close()
+            recorder.discard()
+            raise
+        meta = recorder.close()
+        if meta is None:
+            self._store(path, key, pd.DataFrame())
+        else:
+            self._write_meta(path, dict(meta, key=key))
+
+    def _mismatch(self, key: str) -> None:
+        if self.on_mismatch != LIVE:
+            raise RuntimeError(f"No recorded answer for {key} in {self.directory}. "
+                               f"Record it again with recording_mode={RECORD}.")
+
+    def _store(self, path: str, key: str, value: Any) -> None:
+        meta = {"key": key}
+        if isinstance(value, subprocess.CompletedProcess):
+            meta.update(format=_PROCESS, value={"args": value.args, "returncode": value.returncode,
+                                                "stdout": self._text(value.stdout),
+                                                "stderr": self._text(value.stderr)})
+        elif isinstance(value, pd.DataFrame) and self._store_columnar(f"{path}.feather", value):
+            meta.update(format=_FEATHER, file=os.path.basename(f"{path}.feather"))
+        else:
+            try:
+                meta.update(format=_JSON, value=json.loads(json.dumps(value)))
+            except (TypeError, ValueError):
+                with gzip.open(f"{path}.pickle.gz", "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                meta.update(format=_PICKLE, file=os.path.basename(f"{path}.pickle.gz"))
+        self._write_meta(path, meta)
+
+    def _write_meta(self, path: str, meta: Dict[str, Any]) -> None:
+        # The metadata file marks the answer as recorded, so it is written last and replaced atomically
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, f"{path}.json")
+
+    def _store_columnar(self, file_path: str, df: "pd.DataFrame") -> bool:
+        if not self._columnar:
+            return False
+        try:
+            with columnar.ColumnarFileWriter(file_path, columnar.FEATHER, compression="zstd") as writer:
+                writer.write(df)
+            return True
+        except (TypeError, ValueError):
+            # Column types Arrow cannot hold (e.g. SQLAlchemy type objects) are pickled instead
+            return False
+
+    def _load_chunks(self, meta_path: str) -> Iterator["pd.DataFrame"]:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        file_path = os.path.join(self.directory, meta.get("file", ""))
+        if meta["format"] == _FEATHER:
+            yield from columnar.iter_feather(file_path)
+        elif meta["format"] == _PICKLED_CHUNKS:
+            yield from _unpickle_chunks(file_path)
+        else:
+            yield self._load(meta_path)
+
+    def _load(self, meta_path: str) -> Any:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        file_path = os.path.join(self.directory, meta.get("file", ""))
+        if meta["format"] == _FEATHER:
+            return columnar.read_columnar_file(file_path)
+        if meta["format"] == _PICKLED_CHUNKS:
+            return pd.concat(list(_unpickle_chunks(file_path)), ignore_index=True)
+        if meta["format"] == _PICKLE:
+            with gzip.open(file_path, "rb") as f:
+                return pickle.load(f)
+        if meta["format"] == _PROCESS:
+            value = meta["value"]
+            return subprocess.CompletedProcess(value["args"], value["returncode"],
+                                               self._bytes(value["stdout"]), self._bytes(value["stderr"]))
+        return meta["value"]
+
+    @staticmethod
+    def _text(output: Any) -> Any:
+        # Latin-1 maps every byte to one character, so process output survives JSON unchanged
+        return output.decode("latin-1") if isinstance(output, bytes) else output
+
+    @staticmethod
+    def _bytes(output: Any) -> Any:
+        return output.encode("latin-1") if isinstance(output, str) else output
+
+
+def _unpickle_chunks(file_path: str) -> Iterator["pd.DataFrame"]:
+    with gzip.open(file_path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+class _ChunkRecorder:
+    """Writes the chunks of a streamed result to a recording file as they go by
+
+    Chunks go to a zstd compressed Feather file, or are pickled one after the other without pyarrow or
+    when Arrow cannot hold the first chunk.
+    """
+
+    def __init__(self, path: str, use_columnar: bool) -> None:
+        self._path = path
+        self._use_columnar = use_columnar
+        self._writer = None
+        self._pickle_file = None
+        self._file_path = None
+        self._format = None
+
+    def write(self, chunk: "pd.DataFrame") -> None:
+        if self._format is None:
+            self._open(chunk)
+        elif self._format == _FEATHER:
+            self._writer.write(chunk)
+        else:
+            pickle.dump(chunk, self._pickle_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _open(self, first_chunk: "pd.DataFrame") -> None:
+        if self._use_columnar:
+            self._file_path = f"{self._path}.feather"
+            self._writer = columnar.ColumnarFileWriter(self._file_path, columnar.FEATHER, compression="zstd")
+            try:
+                self._writer.write(first_chunk)
+                self._format = _FEATHER
+                return
+            except (TypeError, ValueError):
+                # Column types Arrow cannot hold (e.g. SQLAlchemy type objects) are pickled instead
+                self._writer = None
+        self._file_path = f"{self._path}.pickle.gz"
+        self._pickle_file = gzip.open(self._file_path, "wb")
+        self._format = _PICKLED_CHUNKS
+        pickle.dump(first_chunk, self._pickle_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def close(self) -> Dict[str, Any]:
+        """Close the file and return the metadata of the recorded result, None when no chunk was written"""
+        if self._format == _FEATHER:
+            self._writer.close()
+        elif self._format == _PICKLED_CHUNKS:
+            self._pickle_file.close()
+        else:
+            return None
+        return {"format": self._format, "file": os.path.basename(self._file_path)}
+
+    def discard(self) -> None:
+        if self._file_path is not None and os.path.exists(self._file_path):
+            os.remove(self._file_path)
+
+
+class RecordingDatabaseClient(DatabaseClient):
+    """DatabaseClient that records its answers to, or replays them from, a `Recording`
+
+    The engine is created as usual but in replay mode it is only connected for calls that were not
+    recorded, with the `live` mismatch policy.
+    """
+
+    def __init__(self, connection_string: str, recording: Recording, **kwargs) -> None:
+        super().__init__(connection_string, **kwargs)
+        self._recording = recording
+        self._recording_namespace = repr(alc.engine.make_url(connection_string))
+
+    def _answer(self, operation: str, args: List[Any], method: Callable, *method_args: Any) -> Any:
+        return self._recording.answer(self._recording_namespace, operation, args,
+                                      lambda: method(self, *method_args))
+
+    def execute_query(self, query: str) -> None:
+        return self._answer("execute_query", [normalize_sql(query)], DatabaseClient.execute_query, query)
+
+    def read_query(self, query: str, params: List[Any] = None) -> Any:
+        return self._answer("read_query", [normalize_sql(query), params], DatabaseClient.read_query, query, params)
+
+    def iter_query(self, query: str, params: List[Any] = None,
+                   chunk_size: int = DatabaseClient.DEFAULT_CHUNK_SIZE) -> Iterator["pd.DataFrame"]:
+        # Recorded under the same key as read_query, as both return the whole result set
+        return self._recording.answer_chunks(self._recording_namespace, "read_query", [normalize_sql(query), params],
+                                             lambda: DatabaseClient.iter_query(self, query, params, chunk_size))
+
+    def load_df(self, df: "pd.DataFrame", schema_name: str, table_name: str, dtype: Dict[str, Any] = None) -> None:
+        return self._answer("load_df", [schema_name, table_name, list(df.columns)], DatabaseClient.load_df,
+                            df, schema_name, table_name, dtype)
+
+    def truncate_table(self, schema_name: str, table_name: str) -> None:
+        return self._answer("truncate_table", [schema_name, table_name], DatabaseClient.truncate_table,
+                            schema_name, table_name)
+
+    def list_schemas(self) -> List[str]:
+        return self._answer("list_schemas", [], DatabaseClient.list_schemas)
+
+    def list_tables(self, schema_name: str) -> List[str]:
+        return self._answer("list_tables", [schema_name], DatabaseClient.list_tables, schema_name)
+
+    def get_table_metadata(self, schema_name: str, table_name: str) -> "pd.DataFrame":
+        return self._answer("get_table_metadata", [schema_name, table_name], DatabaseClient.get_table_metadata,
+                            schema_name, table_name)
+
+    def get_primary_key(self, schema_name: str, table_name: str) -> List[str]:
+        return self._answer("get_primary_key", [schema_name, table_name], DatabaseClient.get_primary_key,
+                            schema_name, table_name)
+
+    def get_schema_snapshot(self, schema_name: str = None) -> Dict[str, Any]:
+        return self._answer("get_schema_snapshot", [schema_name], DatabaseClient.get_schema_snapshot, schema_name)
+
+    def get_row_counts(self, tables: List[str]) -> Dict[str, int]:
+        return self._answer("get_row_counts", [tables], DatabaseClient.get_row_counts, tables)
+
+    def execute_procedure(self, procedure_name: str, params: List[Any] = None) -> Any:
+        return self._answer("execute_procedure", [procedure_name, params], DatabaseClient.execute_procedure,
+                            procedure_name, params)
+
+    def create_ssis_execution(self, folder_name: str, project_name: str, package_name: str,
+                              use32bitruntime: bool = False, reference_id: int = None) -> int:
+        args = [folder_name, project_name, package_name, use32bitruntime, reference_id]
+        return self._answer("create_ssis_execution", args, DatabaseClient.create_ssis_execution, *args)
+
+    def set_ssis_execution_parameter_value(self, execution_id: int, object_type: int,
+                                           parameter_name: str, parameter_value: Any) -> None:
+        args = [execution_id, object_type, parameter_name, parameter_value]
+        return self._answer("set_ssis_execution_parameter_value", args,
+                            DatabaseClient.set_ssis_execution_parameter_value, *args)
+
+    def start_ssis_execution(self, execution_id: int) -> None:
+        return self._answer("start_ssis_execution", [execution_id], DatabaseClient.start_ssis_execution,
+                            execution_id)
+
+
+class RecordingSSISClient(SSISClient):
+    """SSISClient that records package runs to, or replays them from, a `Recording`"""
+
+    def __init__(self, ssis_server: str, recording: Recording, dtexec_path: str = None) -> None:
+        super().__init__(ssis_server, dtexec_path=dtexec_path)
+        self._recording = recording
+
+    def execute_server_package(self, package_path: str) -> subprocess.CompletedProcess:
+        return self._recording.answer(f"ssis://{self.ssis_server}", "execute_server_package", [package_path],
+                                      lambda: SSISClient.execute_server_package(self, package_path))
@@ -0,0 +1,182 @@
+import gzip
+import json
+from typing import Any, Dict, List
+from .lazy import LazyModule
+
+pd = LazyModule("pandas")
+
+SNAPSHOT_VERSION = 1
+
+COLUMNS_QUERY = """
+SELECT c.TABLE_SCHEMA AS schema_name, c.TABLE_NAME AS table_name, c.COLUMN_NAME AS column_name,
+       c.DATA_TYPE AS data_type, c.CHARACTER_MAXIMUM_LENGTH AS max_length, c.NUMERIC_PRECISION AS precision,
+       c.NUMERIC_SCALE AS scale, c.IS_NULLABLE AS is_nullable, c.COLUMN_DEFAULT AS column_default
+FROM INFORMATION_SCHEMA.COLUMNS c
+JOIN INFORMATION_SCHEMA.TABLES t ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+WHERE t.TABLE_TYPE = 'BASE TABLE' {schema_filter}
+ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION
+"""
+
+KEYS_QUERY = """
+SELECT tc.TABLE_SCHEMA AS schema_name, tc.TABLE_NAME AS table_name, tc.CONSTRAINT_NAME AS constraint_name,
+       tc.CONSTRAINT_TYPE AS constraint_type, k.COLUMN_NAME AS column_name,
+       rt.TABLE_SCHEMA + '.' + rt.TABLE_NAME AS referenced_table, rk.COLUMN_NAME AS referenced_column
+FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k
+  ON k.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA AND k.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+LEFT JOIN INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS rc
+  ON rc.CONSTRAINT_SCHEMA = tc.CONSTRAINT_SCHEMA AND rc.CONSTRAINT_NAME = tc.CONSTRAINT_NAME
+LEFT JOIN INFORMATION_SCHEMA.TABLE_CONSTRAINTS rt
+  ON rt.CONSTRAINT_SCHEMA = rc.UNIQUE_CONSTRAINT_SCHEMA AND rt.CONSTRAINT_NAME = rc.UNIQUE_CONSTRAINT_NAME
+LEFT JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE rk
+  ON rk.CONSTRAINT_SCHEMA = rc.UNIQUE_CONSTRAINT_SCHEMA AND rk.CONSTRAINT_NAME = rc.UNIQUE_CONSTRAINT_NAME
+ AND rk.ORDINAL_POSITION = k.POSITION_IN_UNIQUE_CONSTRAINT
+WHERE tc.CONSTRAINT_TYPE IN ('PRIMARY KEY', 'UNIQUE', 'FOREIGN KEY') {schema_filter}
+ORDER BY tc.TABLE_SCHEMA, tc.TABLE_NAME, tc.CONSTRAINT_NAME, k.ORDINAL_POSITION
+"""
+
+INDEXES_QUERY = """
+SELECT s.name AS schema_name, t.name AS table_name, i.name AS index_name, i.type_desc AS index_type,
+       i.is_unique AS is_unique, c.name AS column_name, ic.is_included_column AS is_included
+FROM sys.indexes i
+JOIN sys.tables t ON t.object_id = i.object_id
+JOIN sys.schemas s ON s.schema_id = t.schema_id
+JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+WHERE i.type > 0 AND i.is_primary_key = 0 AND i.is_unique_constraint = 0 {schema_filter}
+ORDER BY s.name, t.name, i.name, ic.is_included_column, ic.key_ordinal, ic.index_column_id
+"""
+
+# Each bulk query with the column its schema filter applies to
+SNAPSHOT_QUERIES = ((COLUMNS_QUERY, "c.TABLE_SCHEMA"), (KEYS_QUERY, "tc.TABLE_SCHEMA"), (INDEXES_QUERY, "s.name"))
+
+
+def _type_name(row: Dict[str, Any]) -> str:
+    data_type = row["data_type"]
+    if not pd.isna(row["max_length"]):
+        length = int(row["max_length"])
+        return f"{data_type}({'max' if length == -1 else length})"
+    if data_type in ("decimal", "numeric"):
+        return f"{data_type}({int(row['precision'])},{int(row['scale'])})"
+    return data_type
+
+
+def _value(value: Any) -> Any:
+    return None if pd.isna(value) else value
+
+
+def build_snapshot(columns: "pd.DataFrame", keys: "pd.DataFrame", indexes: "pd.DataFrame") -> Dict[str, Any]:
+    """Assemble the results of the bulk column, key and index queries into a snapshot dictionary.
+
+    Constraint names are left out, since SQL Server generates them differently in every database.
+    """
+    tables = {}
+    for row in columns.to_dict(orient="records"):
+        table = tables.setdefault(f"{row['schema_name']}.{row['table_name']}",
+                                  {"columns": [], "primary_key": [], "unique": [], "foreign_keys": [], "indexes": {}})
+        table["columns"].append([row["column_name"], _type_name(row), row["is_nullable"] == "YES",
+                                 _value(row["column_default"])])
+
+    constraints = {}
+    for row in keys.to_dict(orient="records"):
+        key = (f"{row['schema_name']}.{row['table_name']}", row["constraint_type"], row["constraint_name"])
+        constraint = constraints.setdefault(key, {"columns": [], "references": _value(row["referenced_table"]),
+                                                  "referenced_columns": []})
+        constraint["columns"].append(row["column_name"])
+        if not pd.isna(row["referenced_column"]):
+            constraint["referenced_columns"].append(row["referenced_column"])
+
+    for (table_name, constraint_type, _), constraint in constraints.items():
+        table = tables.get(table_name)
+        if table is None:
+            continue
+        if constraint_type == "PRIMARY KEY":
+            table["primary_key"] = constraint["columns"]
+        elif constraint_type == "UNIQUE":
+            table["unique"].append(constraint["columns"])
+        else:
+            table["foreign_keys"].append([constraint["columns"], constraint["references"],
+                                          constraint["referenced_columns"]])
+
+    for row in indexes.to_dict(orient="records"):
+        table = tables.get(f"{row['schema_name']}.{row['table_name']}")
+        if table is None:
+            continue
+        index = table["indexes"].setdefault(row["index_name"], [row["index_type"], bool(row["is_unique"]), [], []])
+        index[3 if row["is_included"] else 2].append(row["column_name"])
+
+    for table in tables.values():
+        table["unique"].sort(key=str)
+        table["foreign_keys"].sort(key=str)
+
+    return {"version": SNAPSHOT_VERSION, "tables": tables}
+
+
+def save_snapshot(snapshot: Dict[str, Any], file_path: str) -> None:
+    with gzip.open(file_path, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+
+
+def load_snapshot(file_path: str) -> Dict[str, Any]:
+    with gzip.open(file_path, "rt", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise RuntimeError(f"Unsupported schema snapshot version {snapshot.get('version')} in {file_path}")
+    return snapshot
+
+
+def _diff_table(name: str, expected: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
+    differences = []
+    expected_columns = {c[0]: c for c in expected["columns"]}
+    actual_columns = {c[0]: c for c in actual["columns"]}
+
+    for column, (_, data_type, nullable, default) in expected_columns.items():
+        if column not in actual_columns:
+            differences.append(f"Column '{name}.{column}' missing from actual")
+            continue
+        _, actual_type, actual_nullable, actual_default = actual_columns[column]
+        if data_type != actual_type:
+            differences.append(f"Column '{name}.{column}' has type {actual_type}, expected {data_type}")
+        if nullable != actual_nullable:
+            differences.append(f"Column '{name}.{column}' is {'' if actual_nullable else 'not '}nullable, "
+                               f"expected {'' if nullable else 'not '}nullable")
+        if default != actual_default:
+            differences.append(f"Column '{name}.{column}' has default {actual_default}, expected {default}")
+    for column in actual_columns:
+        if column not in expected_columns:
+            differences.append(f"Unexpected column '{name}.{column}' in actual")
+
+    common = [c for c in expected_columns if c in actual_columns]
+    if common != [c for c in actual_columns if c in expected_columns]:
+        differences.append(f"Columns of '{name}' are in a different order")
+
+    for key, label in (("primary_key", "primary key"), ("unique", "unique constraints"),
+                       ("foreign_keys", "foreign keys")):
+        if expected[key] != actual[key]:
+            differences.append(f"Table '{name}' has {label} {actual[key]}, expected {expected[key]}")
+
+    for index, definition in expected["indexes"].items():
+        if index not in actual["indexes"]:
+            differences.append(f"Index '{index}' on '{name}' missing from actual")
+        elif definition != actual["indexes"][index]:
+            differences.append(f"Index '{index}' on '{name}' is {actual['indexes'][index]}, expected {definition}")
+    for index in actual["indexes"]:
+        if index not in expected["indexes"]:
+            differences.append(f"Unexpected index '{index}' on '{name}' in actual")
+
+    return differences
+
+
+def diff_snapshots(expected: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
+    """Describe every difference between two snapshots, table by table"""
+    differences = []
+    expected_tables, actual_tables = expected["tables"], actual["tables"]
+    for name, table in sorted(expected_tables.items()):
+        if name not in actual_tables:
+            differences.append(f"Table '{name}' missing from actual")
+        else:
+            differences.extend(_diff_table(name, table, actual_tables[name]))
+    for name in sorted(actual_tables):
+        if name not in expected_tables:
+            differences.append(f"Unexpected table '{name}' in actual")
+    return differences
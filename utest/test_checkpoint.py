@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import pandas as pd
+
+from MicrosoftDataLibrary import MicrosoftDataLibrary
+from MicrosoftDataLibrary import DatabaseClient
+from MicrosoftDataLibrary.checkpoint import CheckpointStore, decode_watermark, encode_watermark, parse_watermark, \
+    previous_rowversion
+
+
+class TestCheckpointStore(unittest.TestCase):
+
+    def test_watermark_encoding(self) -> None:
+        for value, encoded in ((b"\x00\x00\x00\x00\x00\x00\x07\xd1", ("rowversion", "0x00000000000007d1")),
+                               (42, ("int", 42)),
+                               (pd.Timestamp("2021-03-04 05:06:07.123"), ("datetime", "2021-03-04T05:06:07.123000")),
+                               (None, ("text", None))):
+            self.assertEqual(encoded, encode_watermark(value))
+            self.assertEqual(value, decode_watermark(*encoded))
+
+    def test_parse_watermark(self) -> None:
+        self.assertEqual(b"\x07\xd1", parse_watermark("0x07D1"))
+        self.assertEqual(12, parse_watermark("12"))
+        self.assertEqual(datetime(2021, 3, 4), parse_watermark("2021-03-04"))
+
+    def test_previous_rowversion(self) -> None:
+        self.assertEqual(b"\x00\x00\x00\x00\x00\x00\x07\xd0", previous_rowversion(b"\x00\x00\x00\x00\x00\x00\x07\xd1"))
+        self.assertEqual(b"\x00\x00\x00\x00\x00\x00\x00\xff", previous_rowversion(b"\x00\x00\x00\x00\x00\x00\x01\x00"))
+
+    def test_checkpoints_persist(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "checkpoints.json")
+            CheckpointStore(file_path).set("conn", "dbo.A", "RowVersion", b"\x01\x02")
+
+            store = CheckpointStore(file_path)
+            self.assertEqual(("RowVersion", b"\x01\x02"), store.get("conn", "dbo.A"))
+            self.assertEqual((None, None), store.get("other", "dbo.A"))
+
+            store.reset("conn", "dbo.A")
+            self.assertEqual((None, None), CheckpointStore(file_path).get("conn", "dbo.A"))
+
+
+class TestReadTableChanges(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.checkpoint_file = os.path.join(self.tmp_dir.name, "checkpoints.json")
+        self.lib = self._library()
+        self.lib.execute_query("CREATE TABLE Sales (Id INTEGER PRIMARY KEY, Amount INTEGER)")
+        self._insert(1, 2, 3)
+
+    def tearDown(self) -> None:
+        self.lib.disconnect_all()
+        self.tmp_dir.cleanup()
+
+    def _library(self) -> MicrosoftDataLibrary:
+        lib = MicrosoftDataLibrary(use_pandas=True, checkpoint_file=self.checkpoint_file)
+        lib.connect("test", f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        return lib
+
+    def _insert(self, *ids: int) -> None:
+        for i in ids:
+            self.lib.execute_query(f"INSERT INTO Sales VALUES ({i}, {i * 10})")
+
+    def test_read_table_changes(self) -> None:
+        self.assertEqual(3, self.lib.set_table_checkpoint("main", "Sales", "Id"))
+        self._insert(4, 5)
+
+        changes = self.lib.read_table_changes("main", "Sales", chunk_size=1)
+        self.assertEqual([4, 5], list(changes["Id"]))
+        self.assertEqual(0, len(self.lib.read_table_changes("main", "Sales")))
+
+        self._insert(6)
+        lib = self._library()
+        self.assertEqual(5, lib.get_table_checkpoint("main", "Sales"))
+        self.assertEqual([6], list(lib.read_table_changes("main", "Sales", advance_checkpoint=False)["Id"]))
+        self.assertEqual(5, lib.get_table_checkpoint("main", "Sales"))
+
+        lib.reset_table_checkpoint("main", "Sales")
+        with self.assertRaises(RuntimeError):
+            lib.read_table_changes("main", "Sales")
+        self.assertEqual(6, len(lib.read_table_changes("main", "Sales", watermark_column="Id")))
+
+    def test_table_changes_should_match(self) -> None:
+        self.lib.set_table_checkpoint("main", "Sales", "Id", value="1")
+        expected = pd.DataFrame({"Id": [3, 2], "Amount": [30, 20]})
+
+        with self.assertRaises(AssertionError):
+            self.lib.table_changes_should_match("main", "Sales", expected)
+        self.assertEqual(1, self.lib.get_table_checkpoint("main", "Sales"))
+
+        self.lib.table_changes_should_match("main", "Sales", expected, keys=["Id"])
+        self.assertEqual(3, self.lib.get_table_checkpoint("main", "Sales"))
+
+    def test_read_changes_below_a_value(self) -> None:
+        changes = self.lib.current_connection.iter_changes("main", "Sales", "Id", after=1, before=3)
+        self.assertEqual([2], list(pd.concat(changes)["Id"]))
+
+
+class TestReadRowversionChanges(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.lib = MicrosoftDataLibrary(use_pandas=True)
+        self.connection = mock.MagicMock(spec=DatabaseClient)
+        self.connection.url = "mssql+pyodbc://dwh"
+        self.connection.is_rowversion_column.return_value = True
+        # A transaction in flight holds 0x07D1, rows up to 0x07D0 and from 0x07D2 on are committed
+        self.connection.get_min_active_rowversion.return_value = b"\x00\x00\x00\x00\x00\x00\x07\xd1"
+        self.lib._connections = {"dwh": self.connection}
+        self.lib._current_connection = self.connection
+
+    def test_rowversions_read_below_min_active_rowversion(self) -> None:
+        self.assertEqual(b"\x00\x00\x00\x00\x00\x00\x07\xd0",
+                         self.lib.set_table_checkpoint("dbo", "FactSales", "RowVersion"))
+        self.connection.get_max_watermark.assert_not_called()
+
+        self.connection.iter_changes.return_value = iter([pd.DataFrame({"Id": [1]})])
+        self.lib.read_table_changes("dbo", "FactSales")
+        self.connection.iter_changes.assert_called_once_with(
+            "dbo", "FactSales", "RowVersion", after=b"\x00\x00\x00\x00\x00\x00\x07\xd0",
+            before=b"\x00\x00\x00\x00\x00\x00\x07\xd1", chunk_size=DatabaseClient.DEFAULT_CHUNK_SIZE)
+        # The row of the transaction in flight is read next time
+        self.assertEqual(b"\x00\x00\x00\x00\x00\x00\x07\xd0", self.lib.get_table_checkpoint("dbo", "FactSales"))
@@ -0,0 +1,125 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from MicrosoftDataLibrary import DatabaseClient
+from MicrosoftDataLibrary.client import ResultBudget
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class TestDatabaseClient(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.client = DatabaseClient(f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        df = pd.DataFrame({"Name": [f"name{i}" for i in range(25)], "Age": range(25)})
+        self.client.load_df(df, schema_name=None, table_name="NameAgeTable")
+
+    def tearDown(self) -> None:
+        self.client.disconnect()
+        self.tmp_dir.cleanup()
+
+    def test_read_query_with_params(self) -> None:
+        df = self.client.read_query("SELECT Name FROM NameAgeTable WHERE Age > ?", params=[22])
+        self.assertEqual(["name23", "name24"], list(df["Name"]))
+
+    def test_iter_query(self) -> None:
+        chunks = list(self.client.iter_query("SELECT * FROM NameAgeTable", chunk_size=10))
+        self.assertEqual([10, 10, 5], [len(chunk) for chunk in chunks])
+
+    def test_get_row_counts(self) -> None:
+        self.client.load_df(pd.DataFrame({"Name": ["a"]}), schema_name=None, table_name="OtherTable")
+        self.client.execute_query("CREATE TABLE EmptyTable (Name TEXT)")
+
+        self.assertEqual({"main.NameAgeTable": 25, "main.OtherTable": 1, "main.EmptyTable": 0},
+                         self.client.get_row_counts(["main.NameAgeTable", "main.OtherTable", "main.EmptyTable"]))
+        self.assertEqual({}, self.client.get_row_counts([]))
+
+        self.client.ROW_COUNT_BATCH_SIZE = 2
+        with mock.patch.object(self.client, "read_query", wraps=self.client.read_query) as read_query:
+            self.assertEqual({"main.NameAgeTable": 25, "main.OtherTable": 1, "main.EmptyTable": 0},
+                             self.client.get_row_counts(["main.NameAgeTable", "main.OtherTable", "main.EmptyTable"]))
+        self.assertEqual([2, 1], [len(c.kwargs["params"]) for c in read_query.call_args_list])
+
+    def test_export_query_to_csv(self) -> None:
+        csv_path = os.path.join(self.tmp_dir.name, "export.csv")
+        self.assertEqual(25, self.client.export_query_to_file("SELECT * FROM NameAgeTable", csv_path, chunk_size=10))
+        pd.testing.assert_frame_equal(self.client.read_query("SELECT * FROM NameAgeTable"), pd.read_csv(csv_path))
+
+        gz_path = os.path.join(self.tmp_dir.name, "export.csv.gz")
+        self.assertEqual(25, self.client.export_query_to_file("SELECT * FROM NameAgeTable", gz_path, chunk_size=10))
+        with gzip.open(gz_path, "rt") as f:
+            self.assertEqual(26, len(f.readlines()))
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_export_query_to_columnar_file(self) -> None:
+        expected = self.client.read_query("SELECT * FROM NameAgeTable")
+        for file_name, read in (("export.parquet", pd.read_parquet), ("export.feather", pd.read_feather)):
+            file_path = os.path.join(self.tmp_dir.name, file_name)
+            self.assertEqual(25, self.client.export_query_to_file("SELECT * FROM NameAgeTable", file_path,
+                                                                  chunk_size=10))
+            pd.testing.assert_frame_equal(expected, read(file_path))
+
+    def test_export_unknown_format(self) -> None:
+        with self.assertRaises(RuntimeError):
+            self.client.export_query_to_file("SELECT * FROM NameAgeTable", os.path.join(self.tmp_dir.name, "a.txt"))
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestResultBudget(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.client = DatabaseClient(f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        self.df = pd.DataFrame({"Name": [f"name{i}" for i in range(25)], "Age": range(25)})
+        self.client.load_df(self.df, schema_name=None, table_name="NameAgeTable")
+        self.client.DEFAULT_CHUNK_SIZE = 10
+
+    def tearDown(self) -> None:
+        self.client.disconnect()
+        self.tmp_dir.cleanup()
+
+    def test_result_within_budget(self) -> None:
+        self.client.result_budget = ResultBudget(max_rows=25, max_bytes=None, strict=True)
+        pd.testing.assert_frame_equal(self.df, self.client.read_query_within_budget("SELECT * FROM NameAgeTable"))
+
+    def test_result_over_budget_is_spilled(self) -> None:
+        self.client.result_budget = ResultBudget(max_rows=None, max_bytes=100, strict=False)
+        result = self.client.read_query_within_budget("SELECT * FROM NameAgeTable")
+
+        self.assertEqual(25, len(result))
+        self.assertEqual({"Name": "name3", "Age": 3}, result[3])
+        self.assertEqual({"Name": "name24", "Age": 24}, result[-1])
+        pd.testing.assert_frame_equal(self.df.iloc[5:15].reset_index(drop=True), result[5:15])
+        self.assertEqual(self.df.to_dict(orient="records"), list(result))
+        self.assertTrue(result == self.df)
+        self.assertFalse(result == self.df.iloc[::-1].reset_index(drop=True))
+        self.assertTrue(result == self.df.to_dict(orient="records"))
+
+        self.client.disconnect()
+        self.assertFalse(os.path.exists(result.file_path))
+
+    def test_strict_budget_fails_fast(self) -> None:
+        self.client.result_budget = ResultBudget(max_rows=10, max_bytes=None, strict=True)
+        with self.assertRaisesRegex(RuntimeError, "exceeded the result budget of 10 rows"):
+            self.client.read_query_within_budget("SELECT * FROM NameAgeTable")
+
+        # Chunks are no larger than needed to see the row budget exceeded
+        self.client.result_budget = ResultBudget(max_rows=3, max_bytes=None, strict=True)
+        with mock.patch.object(self.client, "iter_query", wraps=self.client.iter_query) as iter_query:
+            with self.assertRaisesRegex(RuntimeError, "exceeded the result budget of 3 rows .* after 4 rows"):
+                self.client.read_query_within_budget("SELECT * FROM NameAgeTable")
+        self.assertEqual(4, iter_query.call_args.kwargs["chunk_size"])
+
+    def test_internal_queries_ignore_budget(self) -> None:
+        self.client.result_budget = ResultBudget(max_rows=10, max_bytes=None, strict=True)
+        pd.testing.assert_frame_equal(self.df, self.client.read_query("SELECT * FROM NameAgeTable"))
+        self.assertEqual({"main.NameAgeTable": 25}, self.client.get_row_counts(["main.NameAgeTable"]))
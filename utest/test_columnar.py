@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+from pandas import DataFrame
+from pandas.testing import assert_frame_equal
+
+from MicrosoftDataLibrary import MicrosoftDataLibrary
+from MicrosoftDataLibrary.columnar import ColumnarFileWriter
+
+try:
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestColumnarFiles(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.lib = MicrosoftDataLibrary()
+        self.mock_connection = MagicMock()
+        self.mock_connection.read_query.return_value = DataFrame([[5]])
+        self.lib._current_connection = self.mock_connection
+
+        self.df = DataFrame({"Name": ["Bob", "Alice", "Eve"], "Age": [40, 30, 20]})
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.parquet_path = os.path.join(self.tmp_dir.name, "test.parquet")
+        self.feather_path = os.path.join(self.tmp_dir.name, "test.feather")
+        pyarrow.parquet.write_table(pyarrow.Table.from_pandas(self.df), self.parquet_path, row_group_size=2)
+        pyarrow.feather.write_feather(self.df, self.feather_path, chunksize=2)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_get_parquet(self) -> None:
+        assert_frame_equal(self.df, self.lib.get_parquet(self.parquet_path))
+        assert_frame_equal(self.df[["Age"]], self.lib.get_parquet(self.parquet_path, columns=["Age"]))
+
+    def test_get_feather(self) -> None:
+        assert_frame_equal(self.df, self.lib.get_feather(self.feather_path))
+
+    def test_load_table_in_row_groups(self) -> None:
+        for file_path, load in ((self.parquet_path, self.lib.load_table_with_parquet),
+                                (self.feather_path, self.lib.load_table_with_feather)):
+            self.mock_connection.load_df.reset_mock()
+
+            self.assertEqual(5, load("dbo", "NameAgeTable", file_path))
+
+            chunks = [c.kwargs["df"] for c in self.mock_connection.load_df.call_args_list]
+            self.assertEqual([2, 1], [len(chunk) for chunk in chunks])
+            self.assertEqual("NameAgeTable", self.mock_connection.load_df.call_args.kwargs["table_name"])
+
+    def test_format_is_not_taken_from_extension(self) -> None:
+        for extension, source_path, read in ((".parq", self.parquet_path, self.lib.get_parquet),
+                                             ("", self.feather_path, self.lib.get_feather)):
+            file_path = os.path.join(self.tmp_dir.name, f"copy{extension}")
+            os.replace(source_path, file_path)
+            assert_frame_equal(self.df, read(file_path))
+
+        with self.assertRaisesRegex(RuntimeError, "as a Parquet file"):
+            self.lib.get_parquet(os.path.join(self.tmp_dir.name, "copy"))
+        with self.assertRaisesRegex(RuntimeError, "as a Feather file"):
+            self.lib.get_feather(os.path.join(self.tmp_dir.name, "copy.parq"))
+
+    def test_write_column_that_starts_all_null(self) -> None:
+        chunks = [DataFrame({"Name": ["Bob", "Alice"], "Age": [None, None]}),
+                  DataFrame({"Name": ["Eve", "Joe"], "Age": [20.0, None]}),
+                  DataFrame({"Name": ["Ann"], "Age": [None]})]
+        for file_path, read in ((self.parquet_path, self.lib.get_parquet), (self.feather_path, self.lib.get_feather)):
+            with ColumnarFileWriter(file_path) as writer:
+                for chunk in chunks:
+                    writer.write(chunk)
+
+            df = read(file_path)
+            self.assertEqual(["Bob", "Alice", "Eve", "Joe", "Ann"], list(df["Name"]))
+            self.assertEqual([20.0], list(df["Age"].dropna()))
+            self.assertEqual("float64", df["Age"].dtype)
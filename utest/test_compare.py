@@ -0,0 +1,111 @@
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+
+import pandas as pd
+
+from MicrosoftDataLibrary import MicrosoftDataLibrary
+from MicrosoftDataLibrary.compare import compare_dataframes
+
+
+class TestCompareDataframes(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.expected = pd.DataFrame({
+            "Id": [1, 2, 3],
+            "Name": ["Bob", "Alice", None],
+            "Amount": [10, 20, 30],
+            "Loaded": pd.to_datetime(["2020-01-01 10:00:00", "2020-01-02 10:00:00", "2020-01-03 10:00:00"])
+        })
+
+    def test_dtypes_are_normalized(self) -> None:
+        actual = self.expected.copy()
+        actual["Id"] = actual["Id"].astype("Int32")
+        actual["Amount"] = [Decimal("10.00"), Decimal("20.00"), Decimal("30.00")]
+
+        self.assertTrue(compare_dataframes(self.expected, actual).matches)
+
+        result = compare_dataframes(self.expected, actual, normalize_dtypes=False)
+        self.assertFalse(result.matches)
+        self.assertIn("Column 'Id' has dtype Int32, expected int64", result.report())
+
+    def test_tolerances(self) -> None:
+        actual = self.expected.copy()
+        actual["Amount"] = [10.004, 20, 30]
+        actual["Loaded"] = actual["Loaded"] + pd.Timedelta(milliseconds=500)
+
+        self.assertFalse(compare_dataframes(self.expected, actual).matches)
+        self.assertTrue(compare_dataframes(self.expected, actual, tolerance=0.01,
+                                           datetime_tolerance=timedelta(seconds=1)).matches)
+
+    def test_relative_tolerance_scales_with_expected_value(self) -> None:
+        expected = pd.DataFrame({"Amount": [100.0]})
+        actual = pd.DataFrame({"Amount": [110.0]})
+
+        self.assertFalse(compare_dataframes(expected, actual, relative_tolerance=0.095).matches)
+        self.assertTrue(compare_dataframes(expected, actual, relative_tolerance=0.1).matches)
+        self.assertTrue(compare_dataframes(actual, expected, relative_tolerance=0.095).matches)
+
+    def test_row_order(self) -> None:
+        actual = self.expected.iloc[::-1]
+
+        self.assertFalse(compare_dataframes(self.expected, actual).matches)
+        self.assertTrue(compare_dataframes(self.expected, actual, ignore_order=True).matches)
+        self.assertTrue(compare_dataframes(self.expected, actual, keys=["Id"]).matches)
+
+    def test_row_order_with_tolerance(self) -> None:
+        expected = pd.DataFrame({"v": [1.000, 1.004], "g": ["a", "b"]})
+        actual = pd.DataFrame({"v": [1.005, 0.999], "g": ["a", "b"]})
+        self.assertTrue(compare_dataframes(expected, actual, ignore_order=True, tolerance=0.01).matches)
+
+        expected = pd.DataFrame({"v": [2.0, 1.0], "t": pd.to_datetime(["2020-01-02", "2020-01-01"])})
+        actual = pd.DataFrame({"v": [0.999, 2.001], "t": pd.to_datetime(["2020-01-01 00:00:00.4",
+                                                                          "2020-01-02 00:00:00.3"])})
+        self.assertTrue(compare_dataframes(expected, actual, ignore_order=True, tolerance=0.01,
+                                           datetime_tolerance=timedelta(seconds=1)).matches)
+
+    def test_row_order_across_dtypes(self) -> None:
+        expected = pd.DataFrame({"Id": [2, 10, 1], "Amount": [Decimal("2"), Decimal("10"), Decimal("1")]})
+        actual = pd.DataFrame({"Id": ["1", "10", "2"], "Amount": [1, 10, 2]})
+
+        self.assertTrue(compare_dataframes(expected, actual, ignore_order=True).matches)
+        self.assertTrue(compare_dataframes(expected, actual, keys=["Id"]).matches)
+        self.assertTrue(compare_dataframes(expected, actual.assign(Id=[1.0, 10.0, 2.0]), keys=["Id"]).matches)
+
+    def test_key_alignment_reports_missing_and_unexpected_rows(self) -> None:
+        actual = pd.DataFrame({"Id": [1, 2, 4], "Name": ["Bob", "Alicia", "Eve"], "Amount": [10, 20, 40],
+                               "Loaded": self.expected["Loaded"]})
+
+        report = compare_dataframes(self.expected, actual, keys=["Id"]).report()
+
+        self.assertIn("1 expected row(s) missing from actual, e.g. keys [3]", report)
+        self.assertIn("1 unexpected row(s) in actual, e.g. keys [4]", report)
+        self.assertIn("key 2, column 'Name': expected 'Alice', actual 'Alicia'", report)
+
+        with self.assertRaises(RuntimeError):
+            compare_dataframes(self.expected, pd.concat([actual, actual]), keys=["Id"])
+
+    def test_report_is_bounded(self) -> None:
+        expected = pd.DataFrame({"a": range(100), "b": range(100)})
+        actual = expected + 1
+
+        result = compare_dataframes(expected, actual, max_differences=3)
+
+        self.assertEqual(200, result.mismatch_count)
+        self.assertEqual(["row 0, column 'a': expected 0, actual 1", "row 0, column 'b': expected 0, actual 1",
+                          "row 1, column 'a': expected 1, actual 2"], result.differences)
+
+    def test_row_and_column_count_differences(self) -> None:
+        actual = self.expected.drop(columns="Amount").iloc[:2]
+
+        report = compare_dataframes(self.expected, actual).report()
+
+        self.assertIn("Columns missing from actual: ['Amount']", report)
+        self.assertIn("Expected 3 rows but actual has 2 rows", report)
+
+    def test_dataframes_should_match_keyword(self) -> None:
+        lib = MicrosoftDataLibrary()
+        lib.dataframes_should_match(self.expected, self.expected.iloc[::-1], ignore_order=True)
+
+        with self.assertRaisesRegex(AssertionError, "(?s)Actual does not match expected.*row 0, column 'Id'"):
+            lib.dataframes_should_match(self.expected, self.expected.iloc[::-1])
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+import sqlalchemy as alc
+from sqlalchemy.dialects import mssql
+
+from MicrosoftDataLibrary import MicrosoftDataLibrary
+from MicrosoftDataLibrary.generator import TableDataGenerator
+
+
+class TestTableDataGenerator(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.columns = [
+            {"name": "Id", "type": alc.INTEGER(), "nullable": False},
+            {"name": "Code", "type": alc.VARCHAR(8), "nullable": False},
+            {"name": "Amount", "type": alc.NUMERIC(10, 2), "nullable": True},
+            {"name": "Country", "type": alc.VARCHAR(2), "nullable": True},
+            {"name": "Loaded", "type": alc.DATETIME(), "nullable": True},
+            {"name": "Active", "type": alc.BOOLEAN(), "nullable": True},
+        ]
+
+    def test_values_fit_column_types(self) -> None:
+        df = TableDataGenerator(self.columns, ["Id"], seed=1).generate(1000)
+
+        self.assertEqual(list(range(1000)), list(df["Id"]))
+        self.assertTrue(df["Code"].str.len().between(1, 8).all())
+        self.assertTrue((df["Amount"].round(2) == df["Amount"]).all())
+        self.assertTrue(df["Amount"].between(0, 10 ** 8).all())
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df["Loaded"]))
+        self.assertEqual({True, False}, set(df["Active"]))
+        self.assertFalse(df.isna().any().any())
+
+    def test_values_fit_column_precision(self) -> None:
+        columns = [{"name": "Small", "type": alc.NUMERIC(3, 0), "nullable": False},
+                   {"name": "Amount", "type": alc.NUMERIC(5, 2), "nullable": False},
+                   {"name": "Wide", "type": alc.NUMERIC(4, 1), "nullable": False},
+                   {"name": "Tiny", "type": mssql.TINYINT(), "nullable": False},
+                   {"name": "Step", "type": mssql.TINYINT(), "nullable": False}]
+        distributions = {"Wide": "uniform:-2000:2000", "Tiny": "normal:250:100", "Step": "sequence:200"}
+        generator = TableDataGenerator(columns, [], distributions=distributions, seed=1)
+        df = generator.generate(50)
+        many = TableDataGenerator(columns[:2], [], seed=1).generate(200000)
+
+        for column, values in ((columns[0], many["Small"]), (columns[1], many["Amount"]), (columns[2], df["Wide"])):
+            units = (values.abs() * 10 ** column["type"].scale).round()
+            self.assertTrue((units < 10 ** column["type"].precision).all(), column["name"])
+        self.assertEqual(999.9, df["Wide"].max())
+        self.assertTrue(df["Tiny"].between(0, 255).all())
+        with self.assertRaisesRegex(RuntimeError, "cannot hold the sequence"):
+            generator.generate(10)
+
+    def test_seed_is_reproducible(self) -> None:
+        first = list(TableDataGenerator(self.columns, ["Id"], seed=7).batches(250, 100))
+        second = list(TableDataGenerator(self.columns, ["Id"], seed=7).batches(250, 100))
+
+        self.assertEqual([100, 100, 50], [len(df) for df in first])
+        for a, b in zip(first, second):
+            pd.testing.assert_frame_equal(a, b)
+        self.assertEqual(list(range(250)), list(pd.concat(first)["Id"]))
+
+    def test_distributions_and_nulls(self) -> None:
+        distributions = {"Country": "choice:NL|BE", "Amount": "uniform:5:10", "Code": "constant:X"}
+        df = TableDataGenerator(self.columns, ["Id"], distributions=distributions, null_fraction=0.5,
+                                seed=3, key_offsets={"Id": 100}).generate(2000)
+
+        self.assertEqual(100, df["Id"].min())
+        self.assertEqual({"NL", "BE"}, set(df["Country"].dropna()))
+        self.assertTrue(df["Amount"].dropna().between(5, 10).all())
+        self.assertEqual({"X"}, set(df["Code"]))
+        self.assertTrue(0.4 < df["Country"].isna().mean() < 0.6)
+        self.assertFalse(df["Id"].isna().any())
+
+    def test_string_keys_are_unique(self) -> None:
+        df = TableDataGenerator(self.columns, ["Code"], seed=1).generate(500)
+        self.assertTrue(df["Code"].is_unique)
+        self.assertEqual("00000000", df["Code"].iloc[0])
+
+    def test_identity_columns_are_skipped(self) -> None:
+        self.columns[0]["autoincrement"] = True
+        df = TableDataGenerator(self.columns, [], seed=1).generate(10)
+        self.assertNotIn("Id", df.columns)
+
+    def test_invalid_input(self) -> None:
+        with self.assertRaises(RuntimeError):
+            TableDataGenerator(self.columns, ["Id"], distributions={"Missing": "constant:1"})
+        with self.assertRaises(RuntimeError):
+            TableDataGenerator(self.columns, ["Id"], distributions={"Amount": "uniform:a:b"})
+        with self.assertRaises(RuntimeError):
+            TableDataGenerator([{"name": "Blob", "type": alc.LargeBinary(), "nullable": False}], [])
+
+
+class TestGenerateTableData(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.lib = MicrosoftDataLibrary()
+        self.lib.connect("test", f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        self.lib.execute_query("CREATE TABLE Sales (Id INTEGER PRIMARY KEY, Country VARCHAR(2), Amount NUMERIC(10, 2))")
+
+    def tearDown(self) -> None:
+        self.lib.disconnect_all()
+        self.tmp_dir.cleanup()
+
+    def test_generate_table_data(self) -> None:
+        self.assertEqual(250, self.lib.generate_table_data("main", "Sales", 250, seed=1, batch_size=100,
+                                                           distributions={"Country": "choice:NL|BE"}))
+        self.assertEqual(400, self.lib.generate_table_data("main", "Sales", 150, seed=1))
+
+        df = self.lib.current_connection.read_query("SELECT * FROM Sales")
+        self.assertEqual(list(range(400)), list(df["Id"]))
+        self.assertEqual({"NL", "BE"}, set(df["Country"].iloc[:250]))
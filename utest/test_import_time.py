@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+from os.path import abspath, dirname, join
+
+SRC_DIR = join(dirname(abspath(__file__)), '..', 'src')
+
+HEAVY_MODULES = ('pandas', 'numpy', 'sqlalchemy', 'pyarrow')
+
+# Loose budget for a cold import of the library on top of Robot Framework itself. Wall-clock timings
+# are noisy on shared runners, so this is only checked when MDL_CHECK_IMPORT_TIME is set.
+IMPORT_TIME_BUDGET = 1.0
+
+IMPORT = """
+import json, sys, time
+import robot.api.deco
+start = time.perf_counter()
+import MicrosoftDataLibrary
+imported = time.perf_counter() - start
+loaded = [m for m in %r if m in sys.modules]
+if %r:
+    from robot.libdocpkg import LibraryDocumentation
+    LibraryDocumentation('MicrosoftDataLibrary')
+    loaded = [m for m in %r if m in sys.modules]
+print(json.dumps({'import_time': imported, 'loaded': loaded}))
+"""
+
+
+class TestImportTime(unittest.TestCase):
+
+    def _import_library(self, libdoc: bool = False) -> dict:
+        env = dict(os.environ, PYTHONPATH=SRC_DIR)
+        code = IMPORT % (HEAVY_MODULES, libdoc, HEAVY_MODULES)
+        output = subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True)
+        return json.loads(output.stdout.decode().strip().splitlines()[-1])
+
+    def test_import_does_not_load_heavy_dependencies(self) -> None:
+        self.assertEqual([], self._import_library()['loaded'])
+
+    def test_libdoc_does_not_load_heavy_dependencies(self) -> None:
+        self.assertEqual([], self._import_library(libdoc=True)['loaded'])
+
+    @unittest.skipUnless(os.environ.get('MDL_CHECK_IMPORT_TIME'), 'set MDL_CHECK_IMPORT_TIME to check import time')
+    def test_import_time_budget(self) -> None:
+        import_time = min(self._import_library()['import_time'] for _ in range(3))
+        self.assertLess(import_time, IMPORT_TIME_BUDGET)
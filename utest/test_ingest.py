@@ -0,0 +1,97 @@
+import io
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+
+import pandas as pd
+import sqlalchemy as alc
+from sqlalchemy.dialects import mssql
+
+from MicrosoftDataLibrary import MicrosoftDataLibrary
+from MicrosoftDataLibrary.ingest import ReadOptions
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+class TestReadOptions(unittest.TestCase):
+
+    def test_column_types(self) -> None:
+        columns = [
+            {"name": "Id", "type": mssql.BIGINT(), "autoincrement": True},
+            {"name": "Age", "type": mssql.TINYINT()},
+            {"name": "Count", "type": alc.INTEGER()},
+            {"name": "Active", "type": mssql.BIT()},
+            {"name": "Amount", "type": alc.NUMERIC(10, 2)},
+            {"name": "Country", "type": alc.CHAR(2)},
+            {"name": "Zip", "type": alc.VARCHAR(20)},
+            {"name": "Loaded", "type": mssql.DATETIME2()},
+            {"name": "Version", "type": mssql.TIMESTAMP()},
+        ]
+        options = ReadOptions(columns, ["id", "age", "Count", "Active", "Amount", "Country", "Zip", "Loaded",
+                                        "Version", "Extra"])
+
+        self.assertEqual({"age": "UInt8", "Count": "Int32", "Active": "boolean", "Amount": "float64",
+                          "Country": "category", "Zip": str}, options.dtype)
+        self.assertEqual(["Loaded"], options.parse_dates)
+        self.assertEqual({"age", "Count", "Active", "Amount", "Country", "Zip", "Loaded"}, set(options.sql_types))
+        self.assertEqual(["1"], options.read_options()["true_values"])
+
+    def test_wide_decimals_are_read_exactly(self) -> None:
+        columns = [{"name": "Total", "type": alc.NUMERIC(38, 10)}, {"name": "Price", "type": mssql.MONEY()},
+                   {"name": "Rate", "type": alc.NUMERIC(15, 4)}]
+        options = ReadOptions(columns, ["Total", "Price", "Rate"])
+        self.assertEqual({"Rate": "float64"}, options.dtype)
+
+        csv = io.StringIO("Total,Price,Rate\n12345678901234567.1234567891,922337203685477.5807,1.5\n,,\n")
+        df = pd.read_csv(csv, **options.read_options())
+        self.assertEqual([Decimal("12345678901234567.1234567891"), None], list(df["Total"]))
+        self.assertEqual([Decimal("922337203685477.5807"), None], list(df["Price"]))
+
+        with self.assertRaisesRegex(ValueError, "Cannot convert 'ten' to a decimal"):
+            pd.read_csv(io.StringIO("Total\nten\n"), **options.read_options())
+
+
+class TestTypedLoads(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.lib = MicrosoftDataLibrary(use_pandas=True)
+        self.lib.connect("test", f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        self.lib.execute_query("CREATE TABLE People (Zip VARCHAR(10), Age SMALLINT, Born DATE, Active BOOLEAN)")
+        self.df = pd.DataFrame({"Zip": ["0123", "4567"], "Age": [30, None], "Born": ["2000-01-02", "1990-03-04"],
+                                "Active": [1, 0]})
+
+    def tearDown(self) -> None:
+        self.lib.disconnect_all()
+        self.tmp_dir.cleanup()
+
+    def test_load_table_with_csv(self) -> None:
+        file_path = os.path.join(self.tmp_dir.name, "people.csv")
+        self.df.to_csv(file_path, index=False)
+
+        self.assertEqual(2, self.lib.load_table_with_csv("main", "People", file_path))
+        self.assertEqual(4, self.lib.load_table_with_csv("main", "People", file_path, use_table_types=False))
+
+        df = self.lib.read_query("SELECT * FROM People")
+        self.assertEqual(["0123", "4567", "123", "4567"], list(df["Zip"]))
+        self.assertEqual([30, None], [None if pd.isna(v) else v for v in df["Age"][:2]])
+        self.assertEqual(["2000-01-02", "1990-03-04"], list(df["Born"][:2]))
+
+    def test_values_not_fitting_the_table(self) -> None:
+        file_path = os.path.join(self.tmp_dir.name, "people.csv")
+        self.df.assign(Age=["thirty", "40"]).to_csv(file_path, index=False)
+
+        with self.assertRaisesRegex(RuntimeError, "into the column types of main.People"):
+            self.lib.load_table_with_csv("main", "People", file_path)
+
+    @unittest.skipIf(openpyxl is None, "openpyxl is not installed")
+    def test_load_table_with_xlsx(self) -> None:
+        file_path = os.path.join(self.tmp_dir.name, "people.xlsx")
+        self.df.to_excel(file_path, sheet_name="People", index=False)
+
+        self.assertEqual(2, self.lib.load_table_with_xlsx("main", "People", file_path, "People"))
+        self.assertEqual(["0123", "4567"], list(self.lib.read_query("SELECT Zip FROM People")["Zip"]))
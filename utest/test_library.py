@@ -106,3 +106,49 @@ class TestMicrosoftDataLibrary(unittest.TestCase):
         self.lib.connect_with_config("conn1", config)
         expected_connection_string = '_dialect_://_username_:_password_@_hostname_/_dbname_?driver=_driver_'
         mock_connect.assert_called_once_with(connection_name='conn1', connection_string=expected_connection_string)
+
+    def test_get_row_counts(self) -> None:
+        self.mock_connection.get_partition_row_counts.return_value = {"dbo.A": 3, "dbo.B": 0, "stg.C": 5}
+
+        self.assertEqual({"dbo.a": 3, "stg.C": 5}, self.lib.get_row_counts("a", "stg.C", schema_name="dbo"))
+        self.mock_connection.get_partition_row_counts.assert_called_with(["dbo", "stg"])
+
+        with self.assertRaisesRegex(AssertionError, r"1 of 2 tables are empty: \['dbo.B'\]"):
+            self.lib.tables_should_not_be_empty("dbo.A", "dbo.B")
+        with self.assertRaisesRegex(RuntimeError, "Tables not found"):
+            self.lib.get_row_counts("dbo.D")
+        with self.assertRaises(RuntimeError):
+            self.lib.get_row_counts("A")
+
+        self.mock_connection.list_tables.return_value = ["A", "B"]
+        self.mock_connection.get_row_counts.return_value = {"dbo.A": 3, "dbo.B": 0}
+        self.assertEqual({"dbo.A": 3, "dbo.B": 0}, self.lib.get_row_counts(schema_name="dbo", exact=True))
+        self.mock_connection.get_row_counts.assert_called_once_with(["dbo.A", "dbo.B"])
+
+
+class TestResultBudget(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.lib = MicrosoftDataLibrary(use_pandas=True, max_result_rows=5)
+        # In memory SQLite keeps one connection per thread, so the attached catalog stays available
+        self.lib.connect("test", "sqlite://")
+        self.lib.execute_query("ATTACH DATABASE ':memory:' AS information_schema")
+        self.lib.execute_query("CREATE TABLE information_schema.routines (routine_name TEXT, routine_type TEXT)")
+        for i in range(10):
+            self.lib.execute_query(f"INSERT INTO information_schema.routines VALUES ('usp_{i}', 'PROCEDURE')")
+
+    def tearDown(self) -> None:
+        self.lib.disconnect_all()
+
+    def test_internal_queries_ignore_budget(self) -> None:
+        self.lib.set_result_budget(max_rows=5, mode="strict")
+        self.assertEqual(10, self.lib.read_scalar("SELECT COUNT(*) FROM information_schema.routines"))
+        self.assertEqual("usp_0", self.lib.read_scalar("SELECT routine_name FROM information_schema.routines"))
+        self.assertEqual([f"usp_{i}" for i in range(10)], list(self.lib.list_procedures()))
+        self.assertEqual(10, self.lib.table_row_count("information_schema", "routines"))
+        self.assertEqual(10, self.lib.query_row_count("SELECT * FROM information_schema.routines"))
+
+    def test_keywords_apply_budget(self) -> None:
+        self.lib.set_result_budget(max_rows=5, mode="strict")
+        with self.assertRaisesRegex(RuntimeError, "exceeded the result budget"):
+            self.lib.read_table("information_schema", "routines")
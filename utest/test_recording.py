@@ -0,0 +1,117 @@
+import os
+import subprocess
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from MicrosoftDataLibrary import MicrosoftDataLibrary, columnar
+from MicrosoftDataLibrary.recording import Recording, RecordingSSISClient
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class TestRecording(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.recording_dir = os.path.join(self.tmp_dir.name, "recording")
+        self.db_path = os.path.join(self.tmp_dir.name, "test.db")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _library(self, mode: str, mismatch: str = "fail") -> MicrosoftDataLibrary:
+        lib = MicrosoftDataLibrary(recording_mode=mode, recording_dir=self.recording_dir,
+                                   recording_mismatch=mismatch)
+        lib.connect("test", f"sqlite:///{self.db_path}")
+        return lib
+
+    def _run_suite(self, lib: MicrosoftDataLibrary) -> list:
+        lib.execute_query("CREATE TABLE People (Name VARCHAR(10), Age INTEGER)")
+        before = lib.table_row_count("main", "People")
+        csv_path = os.path.join(self.tmp_dir.name, "people_in.csv")
+        pd.DataFrame({"Name": ["a", "b"], "Age": [1, 2]}).to_csv(csv_path, index=False)
+        loaded = lib.load_table_with_csv("main", "People", csv_path)
+        export_path = os.path.join(self.tmp_dir.name, "people.csv")
+        lib.export_query_to_file("SELECT * FROM People", export_path)
+        with open(export_path) as f:
+            exported = f.read()
+        return [before, loaded, lib.read_query("SELECT *  FROM People\nWHERE Age > 1"),
+                [c["name"] for c in lib.get_table_metadata("main", "People")], exported]
+
+    def test_replay_without_database(self) -> None:
+        recorded = self._run_suite(self._library("record"))
+        os.remove(self.db_path)
+
+        with mock.patch("sqlalchemy.engine.Engine.connect", side_effect=AssertionError("connected")):
+            replayed = self._run_suite(self._library("replay"))
+
+        self.assertEqual([0, 2, [{"Name": "b", "Age": 2}], ["Name", "Age"]], recorded[:4])
+        self.assertEqual(recorded, replayed)
+        self.assertFalse(os.path.exists(self.db_path))
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_streamed_results_and_budget(self) -> None:
+        lib = self._library("record")
+        lib.execute_query("CREATE TABLE Numbers (N INTEGER)")
+        lib.execute_query("INSERT INTO Numbers VALUES (1), (2), (3)")
+        lib.set_result_budget(max_rows=1)
+        export_path = os.path.join(self.tmp_dir.name, "numbers.csv")
+        with mock.patch("pandas.concat", side_effect=AssertionError("concatenated")):
+            lib.export_query_to_file("SELECT N FROM Numbers", export_path, chunk_size=1)
+        recorded = lib.read_query("SELECT N FROM Numbers")
+        os.remove(self.db_path)
+
+        replay = self._library("replay")
+        replay.set_result_budget(max_rows=1)
+        replayed = replay.read_query("SELECT N FROM Numbers")
+        self.assertIsInstance(replayed, columnar.SpilledResult)
+        self.assertEqual([{"N": 1}, {"N": 2}, {"N": 3}], list(recorded))
+        self.assertTrue(replayed == recorded)
+
+        replay.set_result_budget(max_rows=1, mode="strict")
+        with self.assertRaisesRegex(RuntimeError, "exceeded the result budget"):
+            replay.read_query("SELECT N FROM Numbers")
+
+    def test_mismatch_policy(self) -> None:
+        self._run_suite(self._library("record"))
+
+        with self.assertRaisesRegex(RuntimeError, "No recorded answer"):
+            self._library("replay").read_query("SELECT Name FROM People")
+
+        self.assertEqual([{"Name": "a"}, {"Name": "b"}],
+                         self._library("replay", "live").read_query("SELECT Name FROM People"))
+        os.remove(self.db_path)
+        self.assertEqual([{"Name": "a"}, {"Name": "b"}],
+                         self._library("replay").read_query("SELECT Name FROM People"))
+
+    def test_repeated_calls_replay_in_sequence(self) -> None:
+        statuses = iter([2, 2, 7])
+        recorder = Recording(self.recording_dir, mode="record")
+        self.assertEqual([2, 2, 7], [recorder.answer("db", "status", [1], lambda: next(statuses)) for _ in range(3)])
+
+        replayer = Recording(self.recording_dir, mode="replay")
+        self.assertEqual([2, 2, 7, 7], [replayer.answer("db", "status", [1], lambda: 0) for _ in range(4)])
+
+    def test_package_runs(self) -> None:
+        completed = subprocess.CompletedProcess(["dtexec"], 1, b"Started\r\n\xe9", b"")
+        with mock.patch("subprocess.run", return_value=completed) as mock_run:
+            RecordingSSISClient("ssis", Recording(self.recording_dir, mode="record")).execute_server_package("/a/b")
+            replayed = RecordingSSISClient("ssis", Recording(self.recording_dir, mode="replay")) \
+                .execute_server_package("/a/b")
+
+        mock_run.assert_called_once()
+        self.assertEqual((1, b"Started\r\n\xe9"), (replayed.returncode, replayed.stdout))
+
+    def test_invalid_configuration(self) -> None:
+        with self.assertRaises(RuntimeError):
+            MicrosoftDataLibrary(recording_mode="rewind", recording_dir=self.recording_dir)
+        with self.assertRaises(RuntimeError):
+            MicrosoftDataLibrary(recording_mode="replay")
+        with self.assertRaises(RuntimeError):
+            MicrosoftDataLibrary(recording_mode="replay", recording_dir=self.recording_dir, recording_mismatch="x")
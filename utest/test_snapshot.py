@@ -0,0 +1,132 @@
+import copy
+import os
+import tempfile
+import unittest
+from unittest import mock
+from unittest.mock import MagicMock
+
+import pandas as pd
+import sqlalchemy as alc
+
+from MicrosoftDataLibrary import MicrosoftDataLibrary
+from MicrosoftDataLibrary import DatabaseClient
+from MicrosoftDataLibrary.cache import MetadataCache
+from MicrosoftDataLibrary.snapshot import KEYS_QUERY, build_snapshot, diff_snapshots, load_snapshot, save_snapshot
+
+
+def _catalog_frames():
+    columns = pd.DataFrame([
+        ["dbo", "Customer", "Id", "int", None, 10, 0, "NO", None],
+        ["dbo", "Customer", "Name", "nvarchar", 50, None, None, "YES", None],
+        ["dbo", "Customer", "Notes", "nvarchar", -1, None, None, "YES", None],
+        ["dbo", "Sale", "Id", "int", None, 10, 0, "NO", None],
+        ["dbo", "Sale", "CustomerId", "int", None, 10, 0, "NO", None],
+        ["dbo", "Sale", "Amount", "decimal", None, 18, 2, "NO", "((0))"],
+    ], columns=["schema_name", "table_name", "column_name", "data_type", "max_length", "precision", "scale",
+                "is_nullable", "column_default"])
+    keys = pd.DataFrame([
+        ["dbo", "Customer", "PK__Customer__3214EC07", "PRIMARY KEY", "Id", None, None],
+        ["dbo", "Sale", "PK__Sale__3214EC07", "PRIMARY KEY", "Id", None, None],
+        ["dbo", "Sale", "FK_Sale_Customer", "FOREIGN KEY", "CustomerId", "dbo.Customer", "Id"],
+    ], columns=["schema_name", "table_name", "constraint_name", "constraint_type", "column_name",
+                "referenced_table", "referenced_column"])
+    indexes = pd.DataFrame([
+        ["dbo", "Sale", "IX_Sale_Customer", "NONCLUSTERED", False, "CustomerId", False],
+        ["dbo", "Sale", "IX_Sale_Customer", "NONCLUSTERED", False, "Amount", True],
+    ], columns=["schema_name", "table_name", "index_name", "index_type", "is_unique", "column_name",
+                "is_included"])
+    return columns, keys, indexes
+
+
+class TestSchemaSnapshot(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.snapshot = build_snapshot(*_catalog_frames())
+
+    def test_build_snapshot(self) -> None:
+        customer = self.snapshot["tables"]["dbo.Customer"]
+        self.assertEqual([["Id", "int", False, None], ["Name", "nvarchar(50)", True, None],
+                          ["Notes", "nvarchar(max)", True, None]], customer["columns"])
+        self.assertEqual(["Id"], customer["primary_key"])
+
+        sale = self.snapshot["tables"]["dbo.Sale"]
+        self.assertEqual(["Amount", "decimal(18,2)", False, "((0))"], sale["columns"][2])
+        self.assertEqual([[["CustomerId"], "dbo.Customer", ["Id"]]], sale["foreign_keys"])
+        self.assertEqual({"IX_Sale_Customer": ["NONCLUSTERED", False, ["CustomerId"], ["Amount"]]}, sale["indexes"])
+
+    def test_composite_foreign_key_columns_pair_up(self) -> None:
+        # A stand-in INFORMATION_SCHEMA for a foreign key (B, A) on a primary key declared as (A, B)
+        engine = alc.create_engine("sqlite://")
+        with engine.connect() as connection:
+            connection.execute("ATTACH DATABASE ':memory:' AS INFORMATION_SCHEMA")
+            connection.execute("CREATE TABLE INFORMATION_SCHEMA.TABLE_CONSTRAINTS (CONSTRAINT_SCHEMA, "
+                               "CONSTRAINT_NAME, TABLE_SCHEMA, TABLE_NAME, CONSTRAINT_TYPE)")
+            connection.execute("CREATE TABLE INFORMATION_SCHEMA.KEY_COLUMN_USAGE (CONSTRAINT_SCHEMA, "
+                               "CONSTRAINT_NAME, COLUMN_NAME, ORDINAL_POSITION, POSITION_IN_UNIQUE_CONSTRAINT)")
+            connection.execute("CREATE TABLE INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS (CONSTRAINT_SCHEMA, "
+                               "CONSTRAINT_NAME, UNIQUE_CONSTRAINT_SCHEMA, UNIQUE_CONSTRAINT_NAME)")
+            connection.execute("INSERT INTO INFORMATION_SCHEMA.TABLE_CONSTRAINTS VALUES "
+                               "('dbo', 'PK_Parent', 'dbo', 'Parent', 'PRIMARY KEY'), "
+                               "('dbo', 'FK_Child', 'dbo', 'Child', 'FOREIGN KEY')")
+            connection.execute("INSERT INTO INFORMATION_SCHEMA.KEY_COLUMN_USAGE VALUES "
+                               "('dbo', 'PK_Parent', 'A', 1, NULL), ('dbo', 'PK_Parent', 'B', 2, NULL), "
+                               "('dbo', 'FK_Child', 'ChildB', 1, 2), ('dbo', 'FK_Child', 'ChildA', 2, 1)")
+            connection.execute("INSERT INTO INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS VALUES "
+                               "('dbo', 'FK_Child', 'dbo', 'PK_Parent')")
+            keys = pd.read_sql(KEYS_QUERY.format(schema_filter=""), con=connection)
+
+        foreign_key = keys[keys["constraint_name"] == "FK_Child"]
+        self.assertEqual([("ChildB", "B"), ("ChildA", "A")],
+                         list(zip(foreign_key["column_name"], foreign_key["referenced_column"])))
+
+    def test_live_snapshot_is_not_cached(self) -> None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            client = DatabaseClient("sqlite://", metadata_cache=MetadataCache(cache_dir))
+            with mock.patch("pandas.read_sql", side_effect=list(_catalog_frames()) * 2) as read_sql:
+                self.assertEqual(self.snapshot, client.get_schema_snapshot())
+                self.assertEqual(self.snapshot, client.get_schema_snapshot())
+            self.assertEqual(6, read_sql.call_count)
+            client.disconnect()
+
+    def test_save_and_load(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "schema.json.gz")
+            save_snapshot(self.snapshot, file_path)
+            self.assertEqual(self.snapshot, load_snapshot(file_path))
+            self.assertEqual([], diff_snapshots(self.snapshot, load_snapshot(file_path)))
+
+    def test_diff_snapshots(self) -> None:
+        actual = copy.deepcopy(self.snapshot)
+        sale = actual["tables"]["dbo.Sale"]
+        sale["columns"][2][1] = "decimal(19,4)"
+        sale["columns"].append(["Note", "nvarchar(10)", True, None])
+        sale["indexes"] = {}
+        del actual["tables"]["dbo.Customer"]
+        actual["tables"]["dbo.Extra"] = copy.deepcopy(sale)
+
+        self.assertEqual([
+            "Table 'dbo.Customer' missing from actual",
+            "Column 'dbo.Sale.Amount' has type decimal(19,4), expected decimal(18,2)",
+            "Unexpected column 'dbo.Sale.Note' in actual",
+            "Index 'IX_Sale_Customer' on 'dbo.Sale' missing from actual",
+            "Unexpected table 'dbo.Extra' in actual",
+        ], diff_snapshots(self.snapshot, actual))
+
+    def test_schemas_should_match_keyword(self) -> None:
+        lib = MicrosoftDataLibrary()
+        dev, prod = MagicMock(), MagicMock()
+        lib._connections = {"dev": dev, "prod": prod}
+        lib._current_connection = prod
+        dev.get_schema_snapshot.return_value = self.snapshot
+        prod.get_schema_snapshot.return_value = copy.deepcopy(self.snapshot)
+
+        lib.schemas_should_match("dev", schema_name="dbo")
+        dev.get_schema_snapshot.assert_called_once_with(schema_name="dbo")
+
+        prod.get_schema_snapshot.return_value["tables"]["dbo.Customer"]["primary_key"] = []
+        with self.assertRaisesRegex(AssertionError, r"(?s)1 difference.*'dbo.Customer' has primary key \[\]"):
+            lib.schemas_should_match("dev", "prod")
+        lib.schemas_should_match("dev", "prod", schema_name="other")
+
+        with self.assertRaises(RuntimeError):
+            lib.schemas_should_match("missing")
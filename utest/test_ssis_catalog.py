@@ -0,0 +1,208 @@
+import unittest
+from unittest import mock
+
+from pandas import DataFrame
+
+from MicrosoftDataLibrary import MicrosoftDataLibrary
+from MicrosoftDataLibrary import DatabaseClient
+
+
+def _sql(statement: str) -> str:
+    return " ".join(statement.split())
+
+
+CREATE_EXECUTION_SQL = ("SET NOCOUNT ON; DECLARE @execution_id BIGINT; EXEC catalog.create_execution @folder_name = ?, "
+                        "@project_name = ?, @package_name = ?, @use32bitruntime = ?, @reference_id = ?, "
+                        "@execution_id = @execution_id OUTPUT; SELECT @execution_id AS execution_id;")
+SET_PARAMETER_SQL = ("EXEC catalog.set_execution_parameter_value @execution_id = ?, @object_type = ?, "
+                     "@parameter_name = ?, @parameter_value = ?")
+START_EXECUTION_SQL = "EXEC catalog.start_execution @execution_id = ?"
+EXECUTION_STATUS_SQL = "SELECT status FROM catalog.executions WHERE execution_id = ?"
+EVENT_MESSAGES_SQL = ("SELECT TOP (?) event_message_id, message_time, message_type, message_source_name, package_name, "
+                      "event_name, message FROM catalog.event_messages WHERE operation_id = ? AND event_message_id > ?")
+
+
+class StandInCatalog:
+    """Stand-in for the SSISDB engine that records every statement with its parameters
+
+    It answers the catalog procedures and queries the client sends from memory, honouring their
+    parameters, so the tests check the exact T-SQL as well as its effect.
+    """
+
+    url = "mssql+pyodbc://stand-in/SSISDB"
+
+    def __init__(self, statuses) -> None:
+        self.statuses = list(statuses)
+        self.statements = []
+        self.executions = {}
+        self.parameters = []
+        self.started = []
+        self.event_messages = DataFrame(columns=["event_message_id", "operation_id", "message_time", "message_type",
+                                                 "message_source_name", "package_name", "event_name", "message"])
+
+    def add_event_message(self, execution_id, message_type, message) -> None:
+        event_message_id = len(self.event_messages) + 1
+        self.event_messages.loc[len(self.event_messages)] = [event_message_id, execution_id, "2020-01-01",
+                                                             message_type, "Copy", "Copy.dtsx", "OnError", message]
+
+    def statements_like(self, prefix: str) -> list:
+        return [(sql, params) for sql, params in self.statements if sql.startswith(prefix)]
+
+    # Engine.begin() and Connection.execute() as used by DatabaseClient
+    def begin(self) -> "StandInCatalog":
+        return self
+
+    def __enter__(self) -> "StandInCatalog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def execute(self, statement: str, *params) -> mock.MagicMock:
+        sql = _sql(statement)
+        self.statements.append((sql, params))
+        result = mock.MagicMock()
+        if sql == CREATE_EXECUTION_SQL:
+            execution_id = len(self.executions) + 1
+            self.executions[execution_id] = params[:3]
+            result.scalar.return_value = execution_id
+        elif sql == SET_PARAMETER_SQL:
+            self.parameters.append(params)
+        elif sql == START_EXECUTION_SQL:
+            self.started.append(params[0])
+        else:
+            raise AssertionError(f"Unexpected statement: {sql}")
+        return result
+
+    # pandas.read_sql as used by DatabaseClient.read_query
+    def read_sql(self, statement: str, con=None, params=None, **kwargs) -> DataFrame:
+        sql = _sql(statement)
+        self.statements.append((sql, params))
+        if sql == EXECUTION_STATUS_SQL:
+            execution_id, = params
+            if execution_id not in self.started:
+                return DataFrame({"status": [1]})
+            return DataFrame({"status": [self.statuses.pop(0) if len(self.statuses) > 1 else self.statuses[0]]})
+        if sql.startswith(EVENT_MESSAGES_SQL) and sql.endswith("ORDER BY event_message_id"):
+            batch_size, execution_id, after_event_message_id, *message_types = params
+            df = self.event_messages
+            df = df[(df["operation_id"] == execution_id) & (df["event_message_id"] > after_event_message_id)]
+            if message_types:
+                df = df[df["message_type"].isin(message_types)]
+            return df.sort_values("event_message_id").head(batch_size).drop(columns="operation_id")
+        raise AssertionError(f"Unexpected query: {sql}")
+
+
+def _catalog_client(catalog: StandInCatalog) -> DatabaseClient:
+    with mock.patch("sqlalchemy.create_engine", return_value=catalog):
+        return DatabaseClient("mssql+pyodbc://stand-in/SSISDB")
+
+
+class _CatalogTestCase(unittest.TestCase):
+
+    def use_catalog(self, lib: MicrosoftDataLibrary, catalog: StandInCatalog) -> None:
+        lib._ssis_catalog_client = _catalog_client(catalog)
+        patcher = mock.patch("pandas.read_sql", side_effect=catalog.read_sql)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestSSISCatalogExecution(_CatalogTestCase):
+
+    def setUp(self) -> None:
+        self.lib = MicrosoftDataLibrary(ssis_execution_mode="catalog")
+        self.catalog = StandInCatalog(statuses=[2, 2, 7])
+        self.use_catalog(self.lib, self.catalog)
+        self.lib._DEFAULT_SSIS_POLL_INTERVAL = 0
+
+    def test_unknown_execution_mode(self) -> None:
+        with self.assertRaises(RuntimeError):
+            MicrosoftDataLibrary(ssis_execution_mode="bob")
+
+    def test_start_execution_with_parameters(self) -> None:
+        parameters = {"$Project::BatchSize": 10, "Region": "EU", "$ServerOption::LOGGING_LEVEL": 3}
+        execution_id = self.lib.start_ssis_package_execution("Folder", "ETL", "Copy.dtsx", parameters)
+
+        self.assertEqual(1, execution_id)
+        self.assertEqual([1], self.catalog.started)
+        self.assertEqual([(1, 20, "BatchSize", 10), (1, 30, "Region", "EU"), (1, 50, "LOGGING_LEVEL", 3)],
+                         self.catalog.parameters)
+        self.assertEqual([(CREATE_EXECUTION_SQL, ("Folder", "ETL", "Copy.dtsx", False, None))]
+                         + [(SET_PARAMETER_SQL, p) for p in self.catalog.parameters]
+                         + [(START_EXECUTION_SQL, (1,))],
+                         self.catalog.statements)
+
+        with self.assertRaises(RuntimeError):
+            self.lib.start_ssis_package_execution("Folder", "ETL", "Copy.dtsx", {"$Bob::X": 1})
+
+    def test_wait_for_execution(self) -> None:
+        execution_id = self.lib.start_ssis_package_execution("Folder", "ETL", "Copy.dtsx")
+        self.assertEqual("running", self.lib.get_ssis_execution_status(execution_id))
+        self.assertEqual("succeeded", self.lib.wait_for_ssis_execution(execution_id, poll_interval=0))
+        self.assertEqual([(EXECUTION_STATUS_SQL, (1,))] * 3, self.catalog.statements_like("SELECT status"))
+
+    def test_wait_for_execution_timeout(self) -> None:
+        self.catalog.statuses = [2]
+        execution_id = self.lib.start_ssis_package_execution("Folder", "ETL", "Copy.dtsx")
+        with self.assertRaises(RuntimeError):
+            self.lib.wait_for_ssis_execution(execution_id, timeout=0, poll_interval=0)
+
+    def test_execute_package_through_catalog(self) -> None:
+        self.assertEqual(0, self.lib.execute_ssis_package("\\SSISDB\\Folder\\ETL\\Copy.dtsx"))
+        self.assertEqual({1: ("Folder", "ETL", "Copy.dtsx")}, self.catalog.executions)
+
+        self.catalog.statuses = [4]
+        self.assertEqual(1, self.lib.execute_ssis_package("Folder\\ETL\\Copy.dtsx"))
+
+        with self.assertRaises(RuntimeError):
+            self.lib.execute_ssis_package("\\SSISDB\\Copy.dtsx")
+
+
+class TestSSISEventMessages(_CatalogTestCase):
+
+    def setUp(self) -> None:
+        self.lib = MicrosoftDataLibrary()
+        self.catalog = StandInCatalog(statuses=[7])
+        self.use_catalog(self.lib, self.catalog)
+        self.catalog.add_event_message(1, 70, "Validation has started")
+        self.catalog.add_event_message(1, 120, "Login failed")
+        self.catalog.add_event_message(2, 120, "Other execution")
+
+    def test_messages_are_read_incrementally(self) -> None:
+        messages = self.lib.get_new_ssis_event_messages(1)
+        self.assertEqual(["Validation has started", "Login failed"], [m["message"] for m in messages])
+        self.assertEqual([], self.lib.get_new_ssis_event_messages(1))
+        batch_size = self.lib._SSIS_EVENT_MESSAGE_BATCH_SIZE
+        self.assertEqual([(f"{EVENT_MESSAGES_SQL} ORDER BY event_message_id", (batch_size, 1, 0)),
+                          (f"{EVENT_MESSAGES_SQL} ORDER BY event_message_id", (batch_size, 1, 2))],
+                         self.catalog.statements)
+
+        self.catalog.add_event_message(1, 110, "Truncation may occur")
+        messages = self.lib.get_new_ssis_event_messages(1)
+        self.assertEqual(["Truncation may occur"], [m["message"] for m in messages])
+
+        self.lib.reset_ssis_event_message_cursor(1)
+        self.assertEqual(3, len(self.lib.get_new_ssis_event_messages(1)))
+
+    def test_messages_filtered_by_type(self) -> None:
+        messages = self.lib.get_new_ssis_event_messages(1, ["Error"])
+        self.assertEqual(["Login failed"], [m["message"] for m in messages])
+        self.assertEqual([(f"{EVENT_MESSAGES_SQL} AND message_type IN (?) ORDER BY event_message_id",
+                           (self.lib._SSIS_EVENT_MESSAGE_BATCH_SIZE, 1, 0, 120))],
+                         self.catalog.statements)
+        messages = self.lib.get_new_ssis_event_messages(1, ["70"])
+        self.assertEqual(["Validation has started"], [m["message"] for m in messages])
+
+        with self.assertRaises(RuntimeError):
+            self.lib.get_new_ssis_event_messages(1, ["Bob"])
+
+    def test_messages_read_in_batches(self) -> None:
+        self.lib._SSIS_EVENT_MESSAGE_BATCH_SIZE = 1
+        self.assertEqual(2, len(self.lib.get_new_ssis_event_messages(1)))
+        self.assertEqual([(1, 1, 0), (1, 1, 1), (1, 1, 2)],
+                         [params for _, params in self.catalog.statements_like("SELECT TOP (?)")])
+
+    def test_wait_logs_event_messages(self) -> None:
+        self.catalog.started.append(1)
+        self.lib.wait_for_ssis_execution(1, poll_interval=0, log_event_messages=True)
+        self.assertEqual([(1, (110, 120, 130))], list(self.lib._ssis_event_cursors))
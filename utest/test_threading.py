@@ -0,0 +1,161 @@
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from MicrosoftDataLibrary import MicrosoftDataLibrary
+from MicrosoftDataLibrary import DatabaseClient
+from MicrosoftDataLibrary.cache import MetadataCache
+
+
+def _in_thread(func):
+    result = {}
+
+    def run():
+        try:
+            result["value"] = func()
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+class TestThreadSafeConnections(unittest.TestCase):
+
+    @mock.patch.object(DatabaseClient, 'disconnect')
+    @mock.patch.object(DatabaseClient, '__init__', return_value=None)
+    def test_current_connection_per_thread(self, mock_db, mock_disconnect) -> None:
+        lib = MicrosoftDataLibrary()
+        lib.connect('conn1', 'conn_url1')
+        lib.connect('conn2', 'conn_url2')
+        lib.switch_connection('conn1')
+
+        def worker():
+            inherited = lib.current_connection_name()
+            lib.switch_connection('conn2')
+            return inherited, lib.current_connection_name()
+
+        self.assertEqual(('conn1', 'conn2'), _in_thread(worker))
+        self.assertEqual('conn1', lib.current_connection_name())
+
+        lib.disconnect_all()
+        with self.assertRaises(RuntimeError):
+            _in_thread(lambda: lib.current_connection)
+
+    @mock.patch.object(DatabaseClient, 'disconnect')
+    @mock.patch.object(DatabaseClient, '__init__', return_value=None)
+    def test_disconnect_in_worker_thread(self, mock_db, mock_disconnect) -> None:
+        lib = MicrosoftDataLibrary()
+        lib.connect('conn1', 'conn_url1')
+        lib.connect('conn2', 'conn_url2')
+        lib.switch_connection('conn1')
+
+        _in_thread(lib.disconnect)
+
+        mock_disconnect.assert_called_once_with()
+        self.assertEqual(['conn2'], lib.list_connections())
+        with self.assertRaisesRegex(RuntimeError, "No connection has been established"):
+            lib.read_scalar("SELECT 1")
+        with self.assertRaisesRegex(RuntimeError, "No connection has been established"):
+            _in_thread(lambda: lib.current_connection)
+
+        lib.switch_connection('conn2')
+        self.assertEqual('conn2', _in_thread(lib.current_connection_name))
+
+    @mock.patch.object(DatabaseClient, '__init__', return_value=None)
+    def test_concurrent_connects(self, mock_db) -> None:
+        lib = MicrosoftDataLibrary()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            names = list(pool.map(lambda i: lib.connect(f'conn{i}', f'url{i}') or lib.current_connection_name(),
+                                  range(50)))
+
+        self.assertEqual([f'conn{i}' for i in range(50)], names)
+        self.assertEqual(50, lib.number_of_connections())
+
+    @mock.patch.object(DatabaseClient, '__init__', return_value=None)
+    def test_connections_share_metadata_cache(self, mock_db) -> None:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            lib = MicrosoftDataLibrary(cache_dir=cache_dir)
+            lib.connect('conn1', 'conn_url1')
+            mock_db.assert_called_once_with(connection_string='conn_url1', metadata_cache=lib._metadata_cache)
+
+
+class TestMetadataCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.loader = mock.MagicMock(return_value=["dbo", "sales"])
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_lookup_shared_between_caches(self) -> None:
+        self.assertEqual(["dbo", "sales"], MetadataCache(self.tmp_dir.name).get_or_load(("a", "schemas"), self.loader))
+        self.assertEqual(["dbo", "sales"], MetadataCache(self.tmp_dir.name).get_or_load(("a", "schemas"), self.loader))
+        self.loader.assert_called_once_with()
+
+        MetadataCache(self.tmp_dir.name).get_or_load(("b", "schemas"), self.loader)
+        self.assertEqual(2, self.loader.call_count)
+
+    def test_expired_and_cleared_entries_are_reloaded(self) -> None:
+        cache = MetadataCache(self.tmp_dir.name, ttl=-1)
+        cache.get_or_load(("a",), self.loader)
+        cache.get_or_load(("a",), self.loader)
+        self.assertEqual(2, self.loader.call_count)
+
+        cache = MetadataCache(self.tmp_dir.name)
+        cache.get_or_load(("a",), self.loader)
+        cache.clear()
+        cache.get_or_load(("a",), self.loader)
+        self.assertEqual(3, self.loader.call_count)
+        self.assertEqual([], [f for f in os.listdir(self.tmp_dir.name) if not f.endswith(".pickle")])
+
+    def test_clear_namespace(self) -> None:
+        cache = MetadataCache(self.tmp_dir.name)
+        cache.get_or_load(("a", "schemas"), self.loader)
+        cache.get_or_load(("b", "schemas"), self.loader)
+        cache.clear("a")
+        cache.get_or_load(("a", "schemas"), self.loader)
+        cache.get_or_load(("b", "schemas"), self.loader)
+        self.assertEqual(3, self.loader.call_count)
+
+    def test_lock_taken_over_while_loading(self) -> None:
+        cache = MetadataCache(self.tmp_dir.name)
+
+        def slow_loader():
+            # A waiting process removes the lock as stale before this loader finishes
+            os.remove(f"{cache._path(('a',))}.lock")
+            return ["dbo"]
+
+        self.assertEqual(["dbo"], cache.get_or_load(("a",), slow_loader))
+        self.assertEqual(["dbo"], cache.get_or_load(("a",), self.loader))
+
+    def test_statements_drop_cached_metadata(self) -> None:
+        lib = MicrosoftDataLibrary(cache_dir=self.tmp_dir.name)
+        lib.connect("test", f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        try:
+            self.assertFalse(lib.table_exists("main", "t"))
+            lib.execute_query("CREATE TABLE t (Id INTEGER)")
+            self.assertTrue(lib.table_exists("main", "t"))
+        finally:
+            lib.disconnect_all()
+
+    def test_concurrent_lookups_load_once(self) -> None:
+        barrier = threading.Barrier(4)
+
+        def lookup():
+            barrier.wait()
+            return MetadataCache(self.tmp_dir.name).get_or_load(("a",), self.loader)
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: lookup(), range(4)))
+
+        self.assertEqual([["dbo", "sales"]] * 4, results)
+        self.loader.assert_called_once_with()